@@ -2,26 +2,43 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas as pdf_canvas
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet
+import queue
+import threading
 import os
 
+import cut_list_import
+import diagram_view
+import instrument
+import multistart
+import packing
+
 class WoodCuttingOptimizer(tk.Tk):
     """
     A desktop application for optimizing wood cutting using the Tkinter library.
     """
-    BLADE_KERF = 0.125  # Blade thickness in inches
+    BLADE_KERF = packing.BLADE_KERF  # Blade thickness in inches
+    POLL_MS = 100  # How often the GUI checks on a running optimization
+    SEARCH_SECONDS = 10  # Time budget for "Try more orderings"
+    RESIZE_SETTLE_MS = 150  # Quiet time after the last resize event before the diagram is redrawn
+    DIAGRAM_PADDING = 50  # Margin around the diagram on the canvas
 
     def __init__(self):
         super().__init__()
         self.title("Wood Cutting Optimizer")
         self.geometry("800x800")
         self.cut_pieces = []
-        self.boards = []
+        self.patterns = []
         self.stock_length = 0
         self.stock_width = 0
+        # Keeps the last shelf plan so "Add Piece" + "Optimize Cuts" only packs the new line
+        self.packer = packing.IncrementalPacker()
+        # State of the optimization running on the worker thread, if any
+        self.optimizer_thread = None
+        self.cancel_event = None
+        # PDF export running on its own thread, if any
+        self.export_thread = None
+        # Pending redraw after a resize, if any
+        self.resize_job = None
 
         self.create_widgets()
 
@@ -57,6 +74,15 @@ class WoodCuttingOptimizer(tk.Tk):
         self.stock_width_entry = tk.Entry(stock_frame_inner, width=10)
         self.stock_width_entry.grid(row=0, column=3, padx=5, pady=5)
 
+        tk.Label(stock_frame_inner, text="Algorithm:", font=("Helvetica", 11), bg=frame_color, fg=label_color).grid(row=0, column=4, padx=(20, 5), pady=5)
+        self.engine_var = tk.StringVar(value=packing.SHELF)
+        engine_menu = tk.OptionMenu(stock_frame_inner, self.engine_var, *packing.ENGINES)
+        engine_menu.config(width=10)
+        engine_menu.grid(row=0, column=5, padx=5, pady=5)
+
+        self.search_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(stock_frame_inner, text="Try more orderings", variable=self.search_var, font=("Helvetica", 11), bg=frame_color, fg=label_color).grid(row=0, column=6, padx=5, pady=5)
+
         # --- Cut Piece Section ---
         piece_frame = tk.LabelFrame(main_frame, text="Cut Piece Details", font=("Helvetica", 12, "bold"), bg=frame_color, fg=label_color, padx=15, pady=10, relief="groove")
         piece_frame.pack(pady=10, fill="x")
@@ -81,6 +107,9 @@ class WoodCuttingOptimizer(tk.Tk):
         clear_button = tk.Button(piece_frame_inner, text="Clear All", command=self.clear_all, bg="#e74c3c", fg="white", font=("Helvetica", 10, "bold"))
         clear_button.grid(row=0, column=7, padx=5, pady=5)
 
+        import_button = tk.Button(piece_frame_inner, text="Import...", command=self.load_cut_list, bg="#3498db", fg="white", font=("Helvetica", 10, "bold"))
+        import_button.grid(row=0, column=8, padx=5, pady=5)
+
         # --- Cut List Display ---
         tk.Label(main_frame, text="Cut List", font=("Helvetica", 14, "bold"), bg=background_color, fg="#2E4053").pack(pady=(10, 5))
         self.cut_list_display = tk.Text(main_frame, height=5, state="disabled", bg="#fcfcfc", relief="sunken")
@@ -89,8 +118,12 @@ class WoodCuttingOptimizer(tk.Tk):
         # --- Action Buttons ---
         button_frame = tk.Frame(main_frame, bg=background_color)
         button_frame.pack(pady=15)
-        tk.Button(button_frame, text="Optimize Cuts", command=self.optimize_cuts, width=15, bg=button_color, fg="white", font=("Helvetica", 11, "bold")).pack(side="left", padx=10)
-        tk.Button(button_frame, text="Export to PDF", command=self.export_pdf, width=15, bg="#3498db", fg="white", font=("Helvetica", 11, "bold")).pack(side="left", padx=10)
+        self.optimize_button = tk.Button(button_frame, text="Optimize Cuts", command=self.optimize_cuts, width=15, bg=button_color, fg="white", font=("Helvetica", 11, "bold"))
+        self.optimize_button.pack(side="left", padx=10)
+        self.cancel_button = tk.Button(button_frame, text="Cancel", command=self.cancel_optimization, width=15, bg="#e67e22", fg="white", font=("Helvetica", 11, "bold"), state="disabled")
+        self.cancel_button.pack(side="left", padx=10)
+        self.export_button = tk.Button(button_frame, text="Export to PDF", command=self.export_pdf, width=15, bg="#3498db", fg="white", font=("Helvetica", 11, "bold"))
+        self.export_button.pack(side="left", padx=10)
         
         # New Exit button
         tk.Button(button_frame, text="Exit", command=self.destroy, width=15, bg="#808B96", fg="white", font=("Helvetica", 11, "bold")).pack(side="left", padx=10)
@@ -107,16 +140,35 @@ class WoodCuttingOptimizer(tk.Tk):
         self.canvas = tk.Canvas(canvas_frame, bg="white", borderwidth=1, relief="sunken")
         self.canvas.pack(side="left", expand=True, fill="both")
 
-        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
+        self.diagram = diagram_view.VirtualizedDiagram(self.canvas, self.paint_board)
+        self.diagram_scale = 1
+
+        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=self.diagram.yview)
         scrollbar.pack(side="right", fill="y")
         self.canvas.config(yscrollcommand=scrollbar.set)
         
         self.bind("<Configure>", self.on_resize)
 
     def on_resize(self, event):
-        """Redraws the diagram when the window is resized."""
-        if self.boards:
-            self.draw_diagram(self.stock_length, self.stock_width, self.boards)
+        """
+        Stretches the diagram while the window is being resized and redraws it
+        once the size settles, instead of redrawing on every resize event.
+        """
+        if event.widget is not self.canvas or not self.patterns:
+            return
+        new_scale = (event.width - self.DIAGRAM_PADDING * 2) / self.stock_length
+        if new_scale > 0 and new_scale != self.diagram_scale:
+            self.diagram.scale(self.DIAGRAM_PADDING, self.DIAGRAM_PADDING, new_scale / self.diagram_scale)
+            self.diagram_scale = new_scale
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(self.RESIZE_SETTLE_MS, self.finish_resize)
+
+    def finish_resize(self):
+        """Redraws the diagram at the settled window size."""
+        self.resize_job = None
+        if self.patterns:
+            self.draw_diagram(self.stock_length, self.stock_width, self.patterns)
 
     def show_message(self, message, is_error=False):
         """Displays a message in a pop-up window."""
@@ -148,8 +200,9 @@ class WoodCuttingOptimizer(tk.Tk):
         """Updates the text widget with the current cut list."""
         self.cut_list_display.config(state="normal")
         self.cut_list_display.delete("1.0", tk.END)
-        for piece in self.cut_pieces:
-            self.cut_list_display.insert(tk.END, f"{piece['quantity']} x {piece['length']}\" x {piece['width']}\"\n")
+        # One insert for the whole list; an insert per line is slow for imported lists
+        self.cut_list_display.insert(tk.END, "".join(
+            f"{piece['quantity']} x {piece['length']}\" x {piece['width']}\"\n" for piece in self.cut_pieces))
         self.cut_list_display.config(state="disabled")
 
     def clear_all(self):
@@ -159,251 +212,178 @@ class WoodCuttingOptimizer(tk.Tk):
         self.piece_length_entry.delete(0, tk.END)
         self.piece_width_entry.delete(0, tk.END)
         self.quantity_entry.delete(0, tk.END)
+        # Stop any running optimization and ignore whatever it still sends back
+        self.cancel_optimization()
+        self.optimizer_thread = None
+        self.optimize_button.config(state="normal")
         self.cut_pieces = []
-        self.boards = []
+        self.patterns = []
+        # A fresh packer, since a cancelled run may still be using the old one
+        self.packer = packing.IncrementalPacker()
         self.update_cut_list_display()
         self.results_label.config(text="")
-        self.canvas.delete("all")
+        self.diagram.clear()
 
     def optimize_cuts(self):
         """
-        Runs the optimization algorithm and draws the results.
-        Uses a simplified shelf-packing algorithm with rotation logic.
+        Starts the optimization on a worker thread so the window stays responsive.
+        Progress and the result come back through progress_queue.
         """
+        if self.optimizer_thread is not None:
+            return
         try:
-            self.stock_length = float(self.stock_length_entry.get())
-            self.stock_width = float(self.stock_width_entry.get())
-            if self.stock_length <= 0 or self.stock_width <= 0 or not self.cut_pieces:
+            stock_length = float(self.stock_length_entry.get())
+            stock_width = float(self.stock_width_entry.get())
+            if stock_length <= 0 or stock_width <= 0 or not self.cut_pieces:
                 self.show_message("Please enter stock board dimensions and add pieces.", True)
                 return
         except ValueError:
             self.show_message("Invalid stock board dimensions. Please enter numbers.", True)
             return
 
-        all_pieces = []
-        for item in self.cut_pieces:
-            for _ in range(item["quantity"]):
-                all_pieces.append({"length": item["length"], "width": item["width"]})
-        
-        # Sort pieces by area in descending order
-        all_pieces.sort(key=lambda p: p["length"] * p["width"], reverse=True)
-
-        self.boards = []
-        total_waste = 0
-
-        for piece in all_pieces:
-            placed = False
-            # Check if piece fits on any existing board
-            for board in self.boards:
-                # Try to place the piece on an existing shelf
-                for shelf in board["shelves"]:
-                    # Check for fit without rotation
-                    can_fit = (piece["length"] + self.BLADE_KERF <= shelf["remaining_length"]) and \
-                              (piece["width"] <= shelf["height"])
-                    # Check for fit with rotation
-                    can_fit_rotated = (piece["width"] + self.BLADE_KERF <= shelf["remaining_length"]) and \
-                                      (piece["length"] <= shelf["height"])
-                    
-                    if can_fit:
-                        shelf["pieces"].append(piece)
-                        shelf["remaining_length"] -= (piece["length"] + self.BLADE_KERF)
-                        placed = True
-                        break
-                    elif can_fit_rotated:
-                        shelf["pieces"].append({"length": piece["width"], "width": piece["length"]})
-                        shelf["remaining_length"] -= (piece["width"] + self.BLADE_KERF)
-                        placed = True
-                        break
-                if placed:
-                    break
-                
-                # If not placed on an existing shelf, try to create a new shelf on the current board
-                
-                # Check if the piece fits as-is
-                if board["used_height"] + piece["width"] + self.BLADE_KERF <= self.stock_width and piece["length"] <= self.stock_length:
-                    new_shelf = {
-                        "height": piece["width"],
-                        "remaining_length": self.stock_length - (piece["length"] + self.BLADE_KERF),
-                        "pieces": [piece]
-                    }
-                    board["shelves"].append(new_shelf)
-                    board["used_height"] += piece["width"] + self.BLADE_KERF
-                    placed = True
-                    break
-                
-                # Check if the piece fits when rotated
-                if board["used_height"] + piece["length"] + self.BLADE_KERF <= self.stock_width and piece["width"] <= self.stock_length:
-                    new_shelf = {
-                        "height": piece["length"],
-                        "remaining_length": self.stock_length - (piece["width"] + self.BLADE_KERF),
-                        "pieces": [{"length": piece["width"], "width": piece["length"]}]
-                    }
-                    board["shelves"].append(new_shelf)
-                    board["used_height"] += piece["length"] + self.BLADE_KERF
-                    placed = True
-                    break
+        self.cancel_event = threading.Event()
+        results = queue.Queue()
+        self.optimizer_thread = threading.Thread(
+            target=self.run_optimizer,
+            args=(stock_length, stock_width, list(self.cut_pieces), self.engine_var.get(), self.search_var.get(),
+                  self.packer, self.cancel_event, results),
+            daemon=True,
+        )
+        self.optimize_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.results_label.config(text="Optimizing...")
+        self.optimizer_thread.start()
+        self.after(self.POLL_MS, self.poll_optimizer, self.optimizer_thread, results)
 
-            
-            # If not placed on any existing board, create a new board
-            if not placed:
-                # Check if piece fits on a new, empty board
-                if piece["width"] + self.BLADE_KERF <= self.stock_width and piece["length"] + self.BLADE_KERF <= self.stock_length:
-                    new_board = {
-                        "used_height": piece["width"] + self.BLADE_KERF,
-                        "shelves": [{
-                            "height": piece["width"],
-                            "remaining_length": self.stock_length - (piece["length"] + self.BLADE_KERF),
-                            "pieces": [piece]
-                        }]
-                    }
-                    self.boards.append(new_board)
-                # Check if rotated piece fits on a new, empty board
-                elif piece["length"] + self.BLADE_KERF <= self.stock_width and piece["width"] + self.BLADE_KERF <= self.stock_length:
-                    new_board = {
-                        "used_height": piece["length"] + self.BLADE_KERF,
-                        "shelves": [{
-                            "height": piece["length"],
-                            "remaining_length": self.stock_length - (piece["width"] + self.BLADE_KERF),
-                            "pieces": [{"length": piece["width"], "width": piece["length"]}]
-                        }]
-                    }
-                    self.boards.append(new_board)
-                else:
-                    self.show_message(f"Cannot cut piece {piece['length']}\" x {piece['width']}\" as it is too large for the stock board ({self.stock_length}\" x {self.stock_width}\").", True)
-                    self.boards = []
-                    self.canvas.delete("all")
-                    return
+    def run_optimizer(self, stock_length, stock_width, cut_pieces, engine, search, packer, cancel, results):
+        """
+        Runs on the worker thread. It must not touch any widget; everything
+        goes back to the GUI as messages on the results queue.
+        """
+        def piece_progress(placed, total, boards):
+            results.put(("progress", f"Optimizing... {placed}/{total} pieces placed, {boards} boards so far"))
 
-        for board in self.boards:
-            used_area = 0
-            for shelf in board["shelves"]:
-                # Calculate the used length of the shelf
-                used_length_on_shelf = self.stock_length - shelf["remaining_length"]
-                used_area += shelf["height"] * used_length_on_shelf
-            
-            board_area = self.stock_length * self.stock_width
-            board["waste"] = board_area - used_area
-            total_waste += board["waste"]
+        def search_progress(done, total, boards):
+            results.put(("progress", f"Searching... {done}/{total} orderings tried, best so far: {boards} boards"))
 
-        self.results_label.config(text=f"Optimization Results: {len(self.boards)} Boards Used, Total Waste: {total_waste:.2f} sq. in.")
-        self.draw_diagram(self.stock_length, self.stock_width, self.boards)
+        try:
+            if search:
+                plan = multistart.search(stock_length, stock_width, cut_pieces, self.BLADE_KERF, engine=engine,
+                                         time_budget=self.SEARCH_SECONDS, progress=search_progress, cancel=cancel)
+            elif engine == packing.SHELF:
+                plan = packer.optimize(stock_length, stock_width, cut_pieces, self.BLADE_KERF,
+                                       progress=piece_progress, cancel=cancel)
+            else:
+                plan = packing.optimize(stock_length, stock_width, cut_pieces, self.BLADE_KERF, engine=engine,
+                                        progress=piece_progress, cancel=cancel)
+        except packing.Cancelled:
+            results.put(("cancelled", None))
+        except ValueError as e:
+            results.put(("error", str(e)))
+        except Exception as e:
+            # A broken process pool or running out of memory must still hand the GUI back
+            results.put(("error", f"Optimization failed: {str(e) or type(e).__name__}"))
+        else:
+            results.put(("done", plan))
 
-    def draw_diagram(self, stock_length, stock_width, boards):
-        """Draws the cutting diagram on the canvas."""
-        self.canvas.delete("all")
+    def poll_optimizer(self, thread, results):
+        """Applies the messages from the worker thread; reschedules itself until it finishes."""
+        if thread is not self.optimizer_thread:
+            return  # Abandoned by clear_all
+        try:
+            while True:
+                kind, payload = results.get_nowait()
+                if kind == "progress":
+                    self.results_label.config(text=payload)
+                else:
+                    self.finish_optimization(kind, payload)
+                    return
+        except queue.Empty:
+            pass
+        self.after(self.POLL_MS, self.poll_optimizer, thread, results)
+
+    def finish_optimization(self, kind, payload):
+        """Shows the outcome of a finished, failed or cancelled optimization."""
+        cancelled = self.cancel_event.is_set()
+        self.optimizer_thread = None
+        self.optimize_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+        if kind == "error":
+            self.results_label.config(text="")
+            self.show_message(payload, True)
+            self.patterns = []
+            self.diagram.clear()
+        elif kind == "cancelled":
+            self.results_label.config(text="Optimization cancelled.")
+        else:
+            plan = payload
+            self.stock_length = plan.stock_length
+            self.stock_width = plan.stock_width
+            self.patterns = plan.patterns
+            self.results_label.config(text=plan.summary() + (" (cancelled, best found)" if cancelled else ""))
+            items_created = self.diagram.items_created
+            with instrument.phase(plan.stats, "draw"):
+                self.draw_diagram(self.stock_length, self.stock_width, self.patterns)
+            instrument.count(plan.stats, "canvas_items_created", self.diagram.items_created - items_created)
+            instrument.log({"event": "optimize", "engine": self.engine_var.get(), **plan.stats})
+
+    def cancel_optimization(self):
+        """Asks the running optimization to stop; a search keeps its best plan so far."""
+        if self.optimizer_thread is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state="disabled")
+
+    def draw_diagram(self, stock_length, stock_width, patterns):
+        """Lays out the cutting diagram, one board per pattern; only boards near the view are drawn."""
         canvas_width = self.canvas.winfo_width()
-        padding = 50
-        max_board_height = 300
+        padding = self.DIAGRAM_PADDING
         board_spacing = 20
-        canvas_height = padding * 2 + len(boards) * max_board_height + (len(boards) - 1) * board_spacing
-        self.canvas.config(height=canvas_height)
-        scale = (canvas_width - padding * 2) / stock_length
-
-        current_y = padding
-        for i, board in enumerate(boards):
-            x = padding
-            y = current_y
-            board_height_scaled = stock_width * scale
-
-            self.canvas.create_rectangle(x, y, x + stock_length * scale, y + board_height_scaled,
-                                         fill="#C2843A", outline="black")
-
-            piece_y = y
-            for shelf in board["shelves"]:
-                piece_x = x
-                for piece in shelf["pieces"]:
-                    self.canvas.create_rectangle(piece_x, piece_y,
-                                                 piece_x + piece["length"] * scale,
-                                                 piece_y + piece["width"] * scale,
-                                                 fill="#8B4513", outline="black")
-                    self.canvas.create_text(piece_x + piece["length"] * scale / 2,
-                                            piece_y + piece["width"] * scale / 2,
-                                            text=f"{piece['length']}\"x{piece['width']}\"",
-                                            fill="white", font=("Arial", 8))
-                    
-                    piece_x += piece["length"] * scale + self.BLADE_KERF * scale
-                
-                piece_y += shelf["height"] * scale + self.BLADE_KERF * scale
-                
-            used_height_scaled = board["used_height"] * scale
-            waste_height_scaled = board_height_scaled - used_height_scaled
-            if waste_height_scaled > 0:
-                self.canvas.create_rectangle(x, y + used_height_scaled,
-                                             x + stock_length * scale, y + board_height_scaled,
-                                             fill="#A3B18A", outline="black")
-
-            self.canvas.create_text(x, y - 10, anchor="w",
-                                    text=f"Board {i + 1} - Waste: {board['waste']:.2f} sq. in.",
-                                    font=("Arial", 12, "bold"))
-
-            current_y += board_height_scaled + board_spacing
-            
-        self.canvas.config(scrollregion=self.canvas.bbox("all"))
-
-    def draw_diagram_on_pdf(self, c, stock_length, stock_width, boards, start_y):
-        """Draws the entire cutting diagram on the ReportLab canvas."""
-        padding = 0.5 * inch
-        board_spacing = 0.25 * inch
-        page_width, page_height = letter
-
-        # Calculate scale factor
-        scale_x = (page_width - 2 * padding) / stock_length
-        scale_y = (page_width - 2 * padding) / stock_length  # Maintain aspect ratio for diagram
-
-        current_y = start_y
-        for i, board in enumerate(boards):
-            board_width_scaled = stock_length * scale_x
-            board_height_scaled = stock_width * scale_y
-            
-            # Check if a new page is needed
-            if current_y - board_height_scaled - board_spacing < padding:
-                c.showPage()
-                current_y = page_height - padding
-            
-            x = padding
-            y = current_y - board_height_scaled
-
-            # Draw the full stock board rectangle
-            c.setFillColorRGB(0.76, 0.52, 0.23) # Brown
-            c.rect(x, y, board_width_scaled, board_height_scaled, fill=1, stroke=1)
-            
-            # Draw pieces on the board
-            piece_y = y
-            for shelf in board["shelves"]:
-                piece_x = x
-                for piece in shelf["pieces"]:
-                    c.setFillColorRGB(0.55, 0.27, 0.07) # Darker brown
-                    c.rect(piece_x, piece_y, piece["length"] * scale_x, piece["width"] * scale_y, fill=1, stroke=1)
-                    
-                    c.setFillColorRGB(1, 1, 1)
-                    c.setFont("Helvetica", 8)
-                    c.drawString(piece_x + piece["length"] * scale_x / 2 - c.stringWidth(f"{piece['length']}\"x{piece['width']}\"", "Helvetica", 8) / 2,
-                                 piece_y + piece["width"] * scale_y / 2 - 3,
-                                 f"{piece['length']}\"x{piece['width']}\"")
-                    
-                    piece_x += piece["length"] * scale_x + self.BLADE_KERF * scale_x
-                
-                piece_y += shelf["height"] * scale_y + self.BLADE_KERF * scale_y
-            
-            # Draw waste area
-            used_height_scaled = board["used_height"] * scale_y
-            waste_height_scaled = board_height_scaled - used_height_scaled
-            if waste_height_scaled > 0:
-                c.setFillColorRGB(0.64, 0.69, 0.54)
-                c.rect(x, y + used_height_scaled, board_width_scaled, waste_height_scaled, fill=1, stroke=1)
-
-            # Label for the board and its waste
-            c.setFillColorRGB(0, 0, 0)
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(x, y + board_height_scaled + 5, f"Board {i + 1} - Waste: {board['waste']:.2f} sq. in.")
-
-            current_y = y - board_spacing
-            
-        return current_y
+        self.diagram_scale = (canvas_width - padding * 2) / stock_length
+        board_height_scaled = stock_width * self.diagram_scale
+        pitch = board_height_scaled + board_spacing
+        self.diagram.show(patterns, top=padding, pitch=pitch, width=canvas_width,
+                          height=padding * 2 + len(patterns) * pitch - board_spacing)
+
+    def paint_board(self, view, index, pattern, y):
+        """Draws one pattern's board at height y; called by the diagram as it comes into view."""
+        board = pattern["board"]
+        scale = self.diagram_scale
+        x = self.DIAGRAM_PADDING
+        board_height_scaled = self.stock_width * scale
+
+        view.rectangle(x, y, x + self.stock_length * scale, y + board_height_scaled,
+                       fill="#C2843A", outline="black")
+
+        for piece_x, piece_y, piece in packing.board_pieces(board, self.BLADE_KERF):
+            piece_x = x + piece_x * scale
+            piece_y = y + piece_y * scale
+            view.rectangle(piece_x, piece_y,
+                           piece_x + piece["length"] * scale,
+                           piece_y + piece["width"] * scale,
+                           fill="#8B4513", outline="black")
+            view.text(piece_x + piece["length"] * scale / 2,
+                      piece_y + piece["width"] * scale / 2,
+                      text=f"{piece['length']}\"x{piece['width']}\"",
+                      fill="white", font=("Arial", 8))
+
+        used_height_scaled = board["used_height"] * scale
+        waste_height_scaled = board_height_scaled - used_height_scaled
+        if waste_height_scaled > 0:
+            view.rectangle(x, y + used_height_scaled,
+                           x + self.stock_length * scale, y + board_height_scaled,
+                           fill="#A3B18A", outline="black")
+
+        view.text(x, y - 10, anchor="w",
+                  text=f"Pattern {packing.pattern_label(index)} × {pattern['count']} - "
+                       f"Waste: {board['waste']:.2f} sq. in. per board",
+                  font=("Arial", 12, "bold"))
 
     def export_pdf(self):
         """Generates a PDF report from the optimization results and diagram."""
-        if not self.boards:
+        if self.export_thread is not None:
+            return
+        if not self.patterns:
             self.show_message("Please run the optimization first to generate a report.", True)
             return
 
@@ -415,36 +395,54 @@ class WoodCuttingOptimizer(tk.Tk):
         if not file_path:
             return
 
-        c = pdf_canvas.Canvas(file_path, pagesize=letter)
-        y = letter[1] - inch * 0.5 # Starting y position, with top margin
-
-        # Add title
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(inch * 0.5, y, "Wood Cutting Optimization Report")
-        y -= inch * 0.5
-
-        # Add input summary
-        c.setFont("Helvetica", 12)
-        c.drawString(inch * 0.5, y, f"Stock Board: {self.stock_length}\" x {self.stock_width}\"")
-        y -= 0.25 * inch
-        c.drawString(inch * 0.5, y, "Cut Pieces:")
-        y -= 0.25 * inch
-        for item in self.cut_pieces:
-            c.drawString(inch * 0.75, y, f"    - {item['quantity']} x {item['length']}\" x {item['width']}\"")
-            y -= 0.25 * inch
-        y -= 0.25 * inch
-
-        # Add optimization results
-        c.setFont("Helvetica-Bold", 12)
-        results_text = self.results_label.cget("text")
-        c.drawString(inch * 0.5, y, results_text)
-        y -= 0.5 * inch
-
-        # Draw all diagrams
-        self.draw_diagram_on_pdf(c, self.stock_length, self.stock_width, self.boards, y)
-            
-        c.save()
-        self.show_message(f"PDF report saved to {file_path}")
+        # Rendering runs in worker processes, driven from a thread so the window stays responsive
+        results = queue.Queue()
+        self.export_thread = threading.Thread(
+            target=self.run_export,
+            args=(file_path, self.stock_length, self.stock_width, self.patterns, list(self.cut_pieces),
+                  self.results_label.cget("text"), results),
+            daemon=True,
+        )
+        self.export_button.config(state="disabled")
+        self.export_thread.start()
+        self.after(self.POLL_MS, self.poll_export, results)
+
+    def run_export(self, file_path, stock_length, stock_width, patterns, cut_pieces, results_text, results):
+        """Runs on the export thread; like run_optimizer, it only reports back through the results queue."""
+        try:
+            # ReportLab is loaded on the first export, not at startup
+            import pdf_report
+        except ImportError as e:
+            results.put(("error", f"PDF export needs ReportLab: {e}"))
+            return
+        try:
+            stats = pdf_report.write_report(file_path, stock_length, stock_width, patterns, cut_pieces,
+                                            results_text, self.BLADE_KERF)
+        except OSError as e:
+            results.put(("error", f"Could not write {file_path}: {e}"))
+        except Exception as e:
+            # ReportLab, pypdf or the page pool failing must still hand the Export button back
+            results.put(("error", f"PDF export failed: {str(e) or type(e).__name__}"))
+        else:
+            results.put(("done", (file_path, stats)))
+
+    def poll_export(self, results):
+        """Reports the finished export; reschedules itself until then."""
+        try:
+            kind, payload = results.get_nowait()
+        except queue.Empty:
+            self.after(self.POLL_MS, self.poll_export, results)
+            return
+        self.export_thread = None
+        self.export_button.config(state="normal")
+        if kind == "error":
+            self.show_message(payload, True)
+            return
+        file_path, stats = payload
+        instrument.log({"event": "export_pdf", **stats})
+        self.show_message(f"PDF report saved to {file_path}\n"
+                          f"{stats['pages']} pages in {stats['seconds']:.2f} s "
+                          f"({stats['pages_per_second'] or 0:.1f} pages/second)")
 
     def save_cut_list(self):
         """Saves the current cut list to a JSON file."""
@@ -459,20 +457,33 @@ class WoodCuttingOptimizer(tk.Tk):
             self.show_message("Cut list saved successfully!")
 
     def load_cut_list(self):
-        """Loads a cut list from a JSON file."""
+        """
+        Imports a cut list from a CSV, JSON lines or JSON file and merges it into
+        the current one. Rejected rows are written to an error report next to the file.
+        """
         file_path = filedialog.askopenfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json")],
-            title="Load Cut List"
+            filetypes=[("Cut lists", "*.csv *.jsonl *.ndjson *.json *.txt"), ("All files", "*.*")],
+            title="Import Cut List"
         )
-        if file_path:
-            try:
-                with open(file_path, 'r') as f:
-                    self.cut_pieces = json.load(f)
-                self.update_cut_list_display()
-                self.show_message("Cut list loaded successfully!")
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.show_message("Failed to load file. Please select a valid JSON file.", True)
+        if not file_path:
+            return
+        try:
+            cut_pieces, errors = cut_list_import.import_cut_list(file_path, self.cut_pieces)
+        except (OSError, ValueError) as e:
+            self.show_message(f"Failed to import {os.path.basename(file_path)}: {e}", True)
+            return
+        self.cut_pieces = cut_pieces
+        self.update_cut_list_display()
+        if not errors:
+            self.show_message(f"Cut list imported; it now has {len(cut_pieces)} lines.")
+            return
+        report_path = cut_list_import.error_report_path(file_path)
+        try:
+            cut_list_import.write_error_report(errors, report_path)
+        except OSError as e:
+            report_path = f"not saved ({e})"
+        self.show_message(f"Cut list imported; it now has {len(cut_pieces)} lines.\n"
+                          f"{len(errors)} rows were rejected; see the error report: {report_path}", True)
 
 if __name__ == "__main__":
     app = WoodCuttingOptimizer()
@@ -1,12 +1,17 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import math
-from fpdf import FPDF
-from fpdf.enums import XPos, YPos
+
+import cut_list_import
+import diagram_view
+import instrument
+import packing
 
 # A global list to store the pieces to be cut.
 cut_pieces = []
-BLADE_KERF = 0.125 # Kerf (blade thickness) in inches
+BLADE_KERF = packing.BLADE_KERF # Kerf (blade thickness) in inches
+# Stock size and scale of the diagram on screen, for painting boards as they scroll into view
+diagram_layout = {}
 
 # --- Functions for GUI actions ---
 
@@ -44,8 +49,33 @@ def add_piece():
 def update_cut_list_display():
     """Updates the cut list display with the current pieces."""
     cut_list_display.delete(0, tk.END)
-    for item in cut_pieces:
-        cut_list_display.insert(tk.END, f"{item['quantity']} × {item['length']}\" × {item['width']}\"")
+    # One insert for the whole list; an insert per line is slow for imported lists
+    cut_list_display.insert(tk.END, *(f"{item['quantity']} × {item['length']}\" × {item['width']}\"" for item in cut_pieces))
+
+def import_cut_list():
+    """Merges a CSV, JSON lines or JSON cut list into the current one, reporting rejected rows."""
+    global cut_pieces
+    file_path = filedialog.askopenfilename(
+        filetypes=[("Cut lists", "*.csv *.jsonl *.ndjson *.json *.txt"), ("All files", "*.*")],
+        title="Import Cut List"
+    )
+    if not file_path:
+        return
+    try:
+        cut_pieces, errors = cut_list_import.import_cut_list(file_path, cut_pieces)
+    except (OSError, ValueError) as e:
+        show_message(f"Failed to import file: {e}", "error")
+        return
+    update_cut_list_display()
+    if errors:
+        report_path = cut_list_import.error_report_path(file_path)
+        try:
+            cut_list_import.write_error_report(errors, report_path)
+        except OSError as e:
+            report_path = f"the report (not saved: {e})"
+        show_message(f"Imported with {len(errors)} rejected rows; see {report_path}", "error")
+    else:
+        show_message(f"Cut list imported; it now has {len(cut_pieces)} lines.", "success")
         
 def clear_all():
     """Clears all input fields, the cut list, and the diagram."""
@@ -60,7 +90,7 @@ def clear_all():
     update_cut_list_display()
     
     results_label.config(text="")
-    diagram_canvas.delete("all")
+    diagram.clear()
     show_message("All fields cleared.", "success")
     
 def optimize_cuts():
@@ -75,147 +105,91 @@ def optimize_cuts():
         if stock_length <= 0 or stock_width <= 0 or not cut_pieces:
             show_message("Please enter stock dimensions and add pieces.", "error")
             return
-
-        all_pieces = []
-        for item in cut_pieces:
-            for _ in range(item["quantity"]):
-                all_pieces.append({"length": item["length"], "width": item["width"]})
-        
-        # Sort pieces by area (descending) to optimize placement
-        all_pieces.sort(key=lambda p: p["length"] * p["width"], reverse=True)
-
-        boards = []
-        total_waste = 0
-
-        for piece in all_pieces:
-            placed = False
-            for board in boards:
-                # Try to place the piece in an existing shelf
-                for shelf in board["shelves"]:
-                    can_fit = (piece["length"] + BLADE_KERF <= shelf["remaining_length"]) and \
-                              (piece["width"] + BLADE_KERF <= shelf["height"])
-                    can_fit_rotated = (piece["width"] + BLADE_KERF <= shelf["remaining_length"]) and \
-                                      (piece["length"] + BLADE_KERF <= shelf["height"])
-                    
-                    if can_fit:
-                        shelf["pieces"].append(piece)
-                        shelf["remaining_length"] -= (piece["length"] + BLADE_KERF)
-                        placed = True
-                        break
-                    elif can_fit_rotated:
-                        shelf["pieces"].append({"length": piece["width"], "width": piece["length"]})
-                        shelf["remaining_length"] -= (piece["width"] + BLADE_KERF)
-                        placed = True
-                        break
-                
-                if placed:
-                    break
-                
-                # If not placed, try to create a new shelf on the current board
-                new_shelf_height = piece["width"] + BLADE_KERF
-                new_shelf_remaining_height = stock_width - board["used_height"]
-                if new_shelf_height <= new_shelf_remaining_height:
-                    new_shelf = {
-                        "height": new_shelf_height,
-                        "remaining_length": stock_length - (piece["length"] + BLADE_KERF),
-                        "pieces": [piece]
-                    }
-                    board["shelves"].append(new_shelf)
-                    board["used_height"] += new_shelf_height
-                    placed = True
-                    break
-
-            # If not placed on any existing board, start a new one
-            if not placed:
-                new_board = {
-                    "used_height": piece["width"] + BLADE_KERF,
-                    "shelves": [{
-                        "height": piece["width"] + BLADE_KERF,
-                        "remaining_length": stock_length - (piece["length"] + BLADE_KERF),
-                        "pieces": [piece]
-                    }]
-                }
-                boards.append(new_board)
-
-        # Calculate waste for each board and total waste
-        for board in boards:
-            board_area = stock_length * stock_width
-            used_area = 0
-            for shelf in board["shelves"]:
-                used_area += (stock_length - shelf["remaining_length"]) * shelf["height"]
-            board["waste"] = board_area - used_area
-            total_waste += board["waste"]
-
-        # Update the results display
-        results_label.config(text=f"Boards Used: {len(boards)}\nTotal Waste: {total_waste:.2f} sq. in.")
-        
-        # Draw the diagram on the canvas
-        draw_diagram(stock_length, stock_width, boards)
-        
     except ValueError:
         show_message("Invalid stock board dimensions.", "error")
+        return
+
+    try:
+        plan = packing.optimize(stock_length, stock_width, cut_pieces, BLADE_KERF)
+    except ValueError as e:
+        show_message(str(e), "error")
+        diagram.clear()
+        return
 
-def draw_diagram(stock_length, stock_width, boards):
-    """Draws the cutting diagram on the Tkinter canvas."""
-    diagram_canvas.delete("all")
+    # Update the results display
+    results_label.config(text=f"Boards Used: {plan.board_count} ({plan.pattern_count} Patterns)\n"
+                              f"Total Waste: {plan.total_waste:.2f} sq. in.\n"
+                              f"{packing.bound_text(plan)}")
     
+    # Draw the diagram on the canvas
+    items_created = diagram.items_created
+    with instrument.phase(plan.stats, "draw"):
+        draw_diagram(stock_length, stock_width, plan.patterns)
+    instrument.count(plan.stats, "canvas_items_created", diagram.items_created - items_created)
+    instrument.log({"event": "optimize", **plan.stats})
+
+def draw_diagram(stock_length, stock_width, patterns):
+    """Lays out the cutting diagram, one board per pattern; only boards near the view are drawn."""
     # Calculate scale factor to fit within the canvas
     canvas_width = diagram_canvas.winfo_width()
     scale = (canvas_width - 50) / stock_length
-    
-    diagram_height = sum(300 + 10 for _ in boards) + 100
-    diagram_canvas.config(height=diagram_height)
-
-    y_offset = 25
-    for i, board in enumerate(boards):
-        x = 25
-        y = y_offset + i * (stock_width * scale + 50)
-        
-        # Draw the full stock board rectangle
-        diagram_canvas.create_rectangle(x, y, x + stock_length * scale, y + stock_width * scale,
-                                        fill="#C2843A", outline="black")
-        
-        # Draw cut pieces
-        current_y = y
-        for shelf in board["shelves"]:
-            current_x = x
-            for piece in shelf["pieces"]:
-                piece_width = piece["length"] * scale
-                piece_height = piece["width"] * scale
-                
-                diagram_canvas.create_rectangle(current_x, current_y, current_x + piece_width, current_y + piece_height,
-                                                fill="#8B4513", outline="black")
-                
-                # Add text for piece dimensions
-                diagram_canvas.create_text(current_x + piece_width / 2, current_y + piece_height / 2,
-                                           text=f"{piece['length']}\"x{piece['width']}\"", fill="white", font=("Inter", 8))
-                
-                # Draw kerf line
-                current_x += piece_width
-                diagram_canvas.create_rectangle(current_x, current_y, current_x + BLADE_KERF * scale, current_y + piece_height, fill="black", outline="")
-                current_x += BLADE_KERF * scale
-                
-            current_y += shelf["height"] * scale
-            
-        # Draw the offcut area
-        offcut_height = stock_width - board["used_height"]
-        if offcut_height > 0:
-            diagram_canvas.create_rectangle(x, y + board["used_height"] * scale, x + stock_length * scale, y + stock_width * scale,
-                                            fill="#A3B18A", outline="black")
-        
-        # Add waste information
-        diagram_canvas.create_text(x, y + stock_width * scale + 20,
-                                   text=f"Board {i + 1} - Waste: {board['waste']:.2f} sq. in.",
-                                   anchor="nw", font=("Inter", 10, "bold"))
-
-    # After drawing everything
-    diagram_canvas.config(scrollregion=diagram_canvas.bbox("all"))
+    diagram_layout.update(stock_length=stock_length, stock_width=stock_width, scale=scale)
+
+    pitch = stock_width * scale + 50
+    diagram.show(patterns, top=25, pitch=pitch, width=canvas_width, height=25 + len(patterns) * pitch)
+
+def paint_board(view, i, pattern, y):
+    """Draws one pattern's board at height y; called as it scrolls into view."""
+    board = pattern["board"]
+    stock_length = diagram_layout["stock_length"]
+    stock_width = diagram_layout["stock_width"]
+    scale = diagram_layout["scale"]
+    x = 25
+
+    # Draw the full stock board rectangle
+    view.rectangle(x, y, x + stock_length * scale, y + stock_width * scale,
+                   fill="#C2843A", outline="black")
+
+    # Draw cut pieces
+    for piece_x, piece_y, piece in packing.board_pieces(board, BLADE_KERF):
+        current_x = x + piece_x * scale
+        current_y = y + piece_y * scale
+        piece_width = piece["length"] * scale
+        piece_height = piece["width"] * scale
+
+        view.rectangle(current_x, current_y, current_x + piece_width, current_y + piece_height,
+                       fill="#8B4513", outline="black")
+
+        # Add text for piece dimensions
+        view.text(current_x + piece_width / 2, current_y + piece_height / 2,
+                  text=f"{piece['length']}\"x{piece['width']}\"", fill="white", font=("Inter", 8))
+
+        # Draw kerf line
+        current_x += piece_width
+        view.rectangle(current_x, current_y, current_x + BLADE_KERF * scale, current_y + piece_height,
+                       fill="black", outline="")
+
+    # Draw the offcut area
+    offcut_height = stock_width - board["used_height"]
+    if offcut_height > 0:
+        view.rectangle(x, y + board["used_height"] * scale, x + stock_length * scale, y + stock_width * scale,
+                       fill="#A3B18A", outline="black")
+
+    # Add waste information
+    view.text(x, y + stock_width * scale + 20,
+              text=f"Pattern {packing.pattern_label(i)} × {pattern['count']} - "
+                   f"Waste: {board['waste']:.2f} sq. in. per board",
+              anchor="nw", font=("Inter", 10, "bold"))
 
 def export_to_pdf():
     if not cut_pieces:
         show_message("No cut pieces to export.", "error")
         return
 
+    # fpdf is only needed here; importing it at the top slowed every launch
+    from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
+
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("helvetica", size=12)
@@ -243,91 +217,99 @@ def export_to_pdf():
 
 # --- Main Window and Widgets ---
 
-# Create the main window
-root = tk.Tk()
-root.title("Wood Cutting Optimizer")
-root.geometry("800x600")
-
-# Main frame
-main_frame = ttk.Frame(root, padding="15")
-main_frame.pack(fill=tk.BOTH, expand=True)
-
-# Title
-ttk.Label(main_frame, text="Wood Cutting Optimizer", font=("Inter", 24, "bold")).pack(pady=10)
-ttk.Label(main_frame, text="Kerf (blade thickness) is 1/8 inch.", font=("Inter", 10, "italic")).pack()
-
-# Message label for user feedback
-message_label = ttk.Label(main_frame, text="", font=("Inter", 10), anchor="center")
-message_label.pack(pady=5)
-
-# Input frame for stock board
-stock_frame = ttk.LabelFrame(main_frame, text="Stock Board", padding="10")
-stock_frame.pack(fill=tk.X, pady=10)
-stock_frame.columnconfigure(0, weight=1)
-stock_frame.columnconfigure(1, weight=1)
-
-ttk.Label(stock_frame, text="Length (in):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
-stock_length_entry = ttk.Entry(stock_frame)
-stock_length_entry.grid(row=0, column=1, sticky=tk.E, padx=5, pady=2)
-
-ttk.Label(stock_frame, text="Width (in):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
-stock_width_entry = ttk.Entry(stock_frame)
-stock_width_entry.grid(row=1, column=1, sticky=tk.E, padx=5, pady=2)
-
-# Input frame for cut pieces
-piece_frame = ttk.LabelFrame(main_frame, text="Cut Pieces", padding="10")
-piece_frame.pack(fill=tk.X, pady=10)
-piece_frame.columnconfigure(0, weight=1)
-piece_frame.columnconfigure(1, weight=1)
-piece_frame.columnconfigure(2, weight=1)
-piece_frame.columnconfigure(3, weight=1)
-
-ttk.Label(piece_frame, text="Length:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
-piece_length_entry = ttk.Entry(piece_frame)
-piece_length_entry.grid(row=1, column=0, sticky=tk.EW, padx=5, pady=2)
-
-ttk.Label(piece_frame, text="Width:").grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
-piece_width_entry = ttk.Entry(piece_frame)
-piece_width_entry.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=2)
-
-ttk.Label(piece_frame, text="Quantity:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
-quantity_entry = ttk.Entry(piece_frame)
-quantity_entry.grid(row=1, column=2, sticky=tk.EW, padx=5, pady=2)
-
-# Buttons for adding/clearing pieces
-button_frame = ttk.Frame(piece_frame)
-button_frame.grid(row=1, column=3, sticky=tk.EW, padx=5, pady=2)
-ttk.Button(button_frame, text="Add Piece", command=add_piece).pack(side=tk.LEFT, fill=tk.X, expand=True)
-ttk.Button(button_frame, text="Clear All", command=clear_all).pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-# Cut list display
-ttk.Label(main_frame, text="Cut List", font=("Inter", 14, "bold")).pack(pady=5)
-cut_list_display = tk.Listbox(main_frame, height=5)
-cut_list_display.pack(fill=tk.X, pady=5)
-
-# Optimize button
-ttk.Button(main_frame, text="Optimize Cuts", command=optimize_cuts).pack(pady=10)
-# Export to PDF button
-ttk.Button(main_frame, text="Export to PDF", command=export_to_pdf).pack(pady=5)
-
-# Results label
-results_label = ttk.Label(main_frame, text="", font=("Inter", 12))
-results_label.pack(pady=5)
-
-# Canvas for drawing the diagram
-# --- Scrollable Canvas Setup ---
-canvas_container = ttk.Frame(main_frame)
-canvas_container.pack(fill=tk.BOTH, expand=True)
-
-scrollbar = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL)
-scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-#diagram_canvas.pack_forget()  # Remove previous packing
-diagram_canvas = tk.Canvas(canvas_container, bg="white", borderwidth=1, relief="solid", yscrollcommand=scrollbar.set)
-diagram_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-scrollbar.config(command=diagram_canvas.yview)
-
-
-root.mainloop()
-
-
+def main():
+    """Builds the window and runs the GUI. Nothing is built when the module is only imported."""
+    global message_label, stock_length_entry, stock_width_entry, piece_length_entry, piece_width_entry
+    global quantity_entry, cut_list_display, results_label, diagram_canvas, diagram
+
+    # Create the main window
+    root = tk.Tk()
+    root.title("Wood Cutting Optimizer")
+    root.geometry("800x600")
+
+    # Main frame
+    main_frame = ttk.Frame(root, padding="15")
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    # Title
+    ttk.Label(main_frame, text="Wood Cutting Optimizer", font=("Inter", 24, "bold")).pack(pady=10)
+    ttk.Label(main_frame, text="Kerf (blade thickness) is 1/8 inch.", font=("Inter", 10, "italic")).pack()
+
+    # Message label for user feedback
+    message_label = ttk.Label(main_frame, text="", font=("Inter", 10), anchor="center")
+    message_label.pack(pady=5)
+
+    # Input frame for stock board
+    stock_frame = ttk.LabelFrame(main_frame, text="Stock Board", padding="10")
+    stock_frame.pack(fill=tk.X, pady=10)
+    stock_frame.columnconfigure(0, weight=1)
+    stock_frame.columnconfigure(1, weight=1)
+
+    ttk.Label(stock_frame, text="Length (in):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+    stock_length_entry = ttk.Entry(stock_frame)
+    stock_length_entry.grid(row=0, column=1, sticky=tk.E, padx=5, pady=2)
+
+    ttk.Label(stock_frame, text="Width (in):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+    stock_width_entry = ttk.Entry(stock_frame)
+    stock_width_entry.grid(row=1, column=1, sticky=tk.E, padx=5, pady=2)
+
+    # Input frame for cut pieces
+    piece_frame = ttk.LabelFrame(main_frame, text="Cut Pieces", padding="10")
+    piece_frame.pack(fill=tk.X, pady=10)
+    piece_frame.columnconfigure(0, weight=1)
+    piece_frame.columnconfigure(1, weight=1)
+    piece_frame.columnconfigure(2, weight=1)
+    piece_frame.columnconfigure(3, weight=1)
+
+    ttk.Label(piece_frame, text="Length:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+    piece_length_entry = ttk.Entry(piece_frame)
+    piece_length_entry.grid(row=1, column=0, sticky=tk.EW, padx=5, pady=2)
+
+    ttk.Label(piece_frame, text="Width:").grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+    piece_width_entry = ttk.Entry(piece_frame)
+    piece_width_entry.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=2)
+
+    ttk.Label(piece_frame, text="Quantity:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+    quantity_entry = ttk.Entry(piece_frame)
+    quantity_entry.grid(row=1, column=2, sticky=tk.EW, padx=5, pady=2)
+
+    # Buttons for adding/clearing pieces
+    button_frame = ttk.Frame(piece_frame)
+    button_frame.grid(row=1, column=3, sticky=tk.EW, padx=5, pady=2)
+    ttk.Button(button_frame, text="Add Piece", command=add_piece).pack(side=tk.LEFT, fill=tk.X, expand=True)
+    ttk.Button(button_frame, text="Clear All", command=clear_all).pack(side=tk.LEFT, fill=tk.X, expand=True)
+    ttk.Button(button_frame, text="Import...", command=import_cut_list).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+    # Cut list display
+    ttk.Label(main_frame, text="Cut List", font=("Inter", 14, "bold")).pack(pady=5)
+    cut_list_display = tk.Listbox(main_frame, height=5)
+    cut_list_display.pack(fill=tk.X, pady=5)
+
+    # Optimize button
+    ttk.Button(main_frame, text="Optimize Cuts", command=optimize_cuts).pack(pady=10)
+    # Export to PDF button
+    ttk.Button(main_frame, text="Export to PDF", command=export_to_pdf).pack(pady=5)
+
+    # Results label
+    results_label = ttk.Label(main_frame, text="", font=("Inter", 12))
+    results_label.pack(pady=5)
+
+    # Canvas for drawing the diagram
+    # --- Scrollable Canvas Setup ---
+    canvas_container = ttk.Frame(main_frame)
+    canvas_container.pack(fill=tk.BOTH, expand=True)
+
+    scrollbar = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    #diagram_canvas.pack_forget()  # Remove previous packing
+    diagram_canvas = tk.Canvas(canvas_container, bg="white", borderwidth=1, relief="solid", yscrollcommand=scrollbar.set)
+    diagram_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    diagram = diagram_view.VirtualizedDiagram(diagram_canvas, paint_board)
+    scrollbar.config(command=diagram.yview)
+
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Command-line batch optimizer for saved cut lists.
+
+Optimizes every JSON cut list (the format written by "Save Cut List") in
+the given directories or glob patterns across a pool of worker processes,
+writes one result file per job and prints a summary table.
+
+Example:
+
+    python batch.py orders/ "rush/*.json" --stock-length 96 --stock-width 48
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import instrument
+import packing
+from plan_cache import PlanCache
+
+RESULT_SUFFIX = ".result.json"
+
+_cache = None  # this process's PlanCache, created by the first job that needs it
+
+
+def find_jobs(inputs):
+    """Returns the sorted, de-duplicated cut-list files named by directories, globs or paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "*.json"))
+        else:
+            matches = glob.glob(item)
+        paths.update(path for path in matches if not path.endswith(RESULT_SUFFIX))
+    return sorted(paths)
+
+
+def read_cut_list(path):
+    """Loads a saved cut list, raising ValueError if a line is malformed."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("a cut list must be a JSON list of pieces")
+    cut_pieces = []
+    for line_number, item in enumerate(data, start=1):
+        try:
+            piece = {"length": float(item["length"]), "width": float(item["width"]),
+                     "quantity": int(item["quantity"])}
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"piece {line_number} needs numeric length, width and quantity")
+        if piece["length"] <= 0 or piece["width"] <= 0 or piece["quantity"] <= 0:
+            raise ValueError(f"piece {line_number} must have positive length, width and quantity")
+        cut_pieces.append(piece)
+    return cut_pieces
+
+
+def result_path(path, output_dir=None):
+    """Where the result for a cut-list file is written."""
+    base = os.path.splitext(os.path.basename(path))[0] + RESULT_SUFFIX
+    return os.path.join(output_dir or os.path.dirname(path), base)
+
+
+def run_job(path, stock_length, stock_width, kerf, engine, rule, output_dir, cache_dir=None, resolution=None):
+    """Optimizes one cut-list file and writes its result. Returns a summary row."""
+    global _cache
+    start = time.perf_counter()
+    row = {"job": path, "boards": None, "waste": None, "seconds": None, "error": None, "cached": False,
+           "stats": None}
+    try:
+        cut_pieces = read_cut_list(path)
+        if cache_dir:
+            if _cache is None:
+                _cache = PlanCache(cache_dir)
+            misses = _cache.stats()["misses"]
+            plan = _cache.optimize(stock_length, stock_width, cut_pieces, kerf, rule=rule, engine=engine,
+                                   resolution=resolution)
+            row["cached"] = _cache.stats()["misses"] == misses
+        else:
+            plan = packing.optimize(stock_length, stock_width, cut_pieces, kerf, rule=rule, engine=engine,
+                                   resolution=resolution)
+        with open(result_path(path, output_dir), "w") as f:
+            json.dump(plan.to_dict(), f)
+        row["boards"] = plan.board_count
+        row["waste"] = plan.total_waste
+        row["stats"] = plan.stats
+    except (OSError, ValueError) as e:
+        row["error"] = str(e)
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def format_summary(rows, elapsed):
+    """Returns the summary table and throughput as printable text."""
+    width = max([len("Job")] + [len(row["job"]) for row in rows])
+    lines = [f"{'Job':<{width}}  {'Boards':>6}  {'Waste (sq. in.)':>15}  {'Seconds':>8}"]
+    for row in rows:
+        if row["error"]:
+            lines.append(f"{row['job']:<{width}}  ERROR: {row['error']}")
+        else:
+            lines.append(f"{row['job']:<{width}}  {row['boards']:>6}  {row['waste']:>15.2f}  {row['seconds']:>8.3f}")
+    done = [row for row in rows if not row["error"]]
+    lines.append("")
+    lines.append(f"{len(done)} of {len(rows)} jobs optimized, "
+                 f"{sum(row['boards'] for row in done)} boards, "
+                 f"{sum(row['waste'] for row in done):.2f} sq. in. waste")
+    cached = sum(1 for row in done if row["cached"])
+    if cached:
+        lines.append(f"{cached} results served from the cache")
+    rate = len(rows) / elapsed if elapsed > 0 else float("inf")
+    lines.append(f"{elapsed:.2f} s, {rate:.1f} jobs/second")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize a batch of saved cut lists.")
+    parser.add_argument("inputs", nargs="+", help="cut-list JSON files, directories or glob patterns")
+    parser.add_argument("--stock-length", type=float, required=True, help="stock board length in inches")
+    parser.add_argument("--stock-width", type=float, required=True, help="stock board width in inches")
+    parser.add_argument("--kerf", type=float, default=packing.BLADE_KERF, help="blade kerf in inches")
+    parser.add_argument("--engine", choices=packing.ENGINES, default=packing.SHELF)
+    parser.add_argument("--rule", choices=(packing.FIRST_FIT, packing.BEST_FIT), default=packing.FIRST_FIT)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output-dir", help="where to write result files (default: next to each cut list)")
+    parser.add_argument("--summary", help="also write the summary rows to this JSON file")
+    parser.add_argument("--cache-dir", help="reuse plans for identical jobs through a cache in this directory")
+    parser.add_argument("--resolution", type=int, default=None,
+                        help="pack in exact fixed-point units of 1/N inch, e.g. 64 (default: float inches)")
+    parser.add_argument("--stats-log", help="append each job's phase timings and counters to this JSON lines file")
+    args = parser.parse_args(argv)
+
+    paths = find_jobs(args.inputs)
+    if not paths:
+        parser.error("no cut-list files found")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    job_args = (args.stock_length, args.stock_width, args.kerf, args.engine, args.rule, args.output_dir,
+                args.cache_dir, args.resolution)
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1:
+        rows = [run_job(path, *job_args) for path in paths]
+    else:
+        # Imported here so the workers, which import this module, do not pay for it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Small jobs dominate, so hand them out in chunks to cut IPC overhead
+            chunksize = max(1, len(paths) // (workers * 4))
+            rows = list(pool.map(run_job, paths, *[[arg] * len(paths) for arg in job_args], chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    print(format_summary(rows, elapsed))
+    if args.stats_log:
+        for row in rows:
+            instrument.log(dict(row, event="batch_job"), args.stats_log)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({"elapsed": elapsed, "jobs_per_second": len(rows) / elapsed if elapsed > 0 else None,
+                       "jobs": rows}, f, indent=4)
+    return 1 if any(row["error"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Benchmark for the packing engines.
+
+Generates seeded synthetic cut lists for a few realistic job profiles, packs
+each with every engine that takes it and records runtime, peak memory,
+boards used, total waste and utilization (piece area over stock area used).
+The lumber profile is only run with the 1-D engine. Results can be
+saved as a baseline and later runs compared against it, so a change that
+makes packing slower or wastes more wood is flagged.
+
+Example:
+
+    python benchmark.py --output bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json
+
+The same profile, size and seed always give the same cut list.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import packing
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+# A run is flagged as slower when it takes this much longer than the baseline,
+# as a fraction, and more than MIN_SLOWDOWN seconds longer, to ignore timer noise
+TIME_TOLERANCE = 0.25
+MIN_SLOWDOWN = 0.05
+
+
+def _add(lines, length, width, quantity=1):
+    key = (round(length, 3), round(width, 3))
+    lines[key] = lines.get(key, 0) + quantity
+
+
+def _cabinet(rng, piece_count):
+    """Carcass parts of base and wall cabinets cut from 96" x 48" plywood."""
+    lines = {}
+    count = 0
+    while count < piece_count:
+        width = rng.choice(range(12, 37, 3))
+        height, depth = rng.choice(((34.5, 23.25), (30, 11.25), (42, 11.25)))
+        parts = [(height, depth, 2), (width - 1.5, depth, 2), (width - 1.5, height - 1.5, 1),
+                 (width - 1.625, depth - 1, rng.randint(0, 2)), (width / 2 - 0.125, height - 0.25, 2)]
+        for length, part_width, quantity in parts:
+            quantity = min(quantity, piece_count - count)
+            if quantity > 0:
+                _add(lines, length, part_width, quantity)
+                count += quantity
+    return 96, 48, lines
+
+
+def _shelving(rng, piece_count):
+    """Shelves and uprights ripped from 96" x 12" boards."""
+    lines = {}
+    count = 0
+    while count < piece_count:
+        if rng.random() < 0.3:
+            length = rng.choice((48, 60, 72, 84))
+        else:
+            length = rng.choice(range(18, 49, 2)) + rng.choice((0, 0.5))
+        quantity = min(rng.randint(1, 12), piece_count - count)
+        _add(lines, length, 11.25, quantity)
+        count += quantity
+    return 96, 12, lines
+
+
+def _flooring(rng, piece_count):
+    """Random-length floor boards cut from 96" x 5" strips; many distinct lengths."""
+    lines = {}
+    for _ in range(piece_count):
+        _add(lines, rng.randint(8 * 8, 95 * 8) / 8, 4.75)
+    return 96, 5, lines
+
+
+def _tiny(rng, piece_count):
+    """Small parts (blocks, cleats, plugs) from 48" x 24" stock in a few sizes."""
+    sizes = [(rng.randint(4, 32) / 8, rng.randint(4, 32) / 8) for _ in range(40)]
+    lines = {}
+    for _ in range(piece_count):
+        _add(lines, *rng.choice(sizes))
+    return 48, 24, lines
+
+
+def _huge(rng, piece_count):
+    """Parts of nearly a whole sheet, which mostly get a 96" x 48" board each."""
+    lines = {}
+    for _ in range(piece_count):
+        _add(lines, rng.randint(40, 95), rng.randint(20, 47))
+    return 96, 48, lines
+
+
+def _lumber(rng, piece_count):
+    """Framing and trim cut from 96" 2x4s: a few common lengths in high quantities."""
+    lengths = [rng.randint(8 * 8, 92 * 8) / 8 for _ in range(12)]
+    lines = {}
+    count = 0
+    while count < piece_count:
+        quantity = min(rng.randint(1, 200), piece_count - count)
+        _add(lines, rng.choice(lengths), 3.5, quantity)
+        count += quantity
+    return 96, 3.5, lines
+
+
+PROFILES = {
+    "cabinet": _cabinet,
+    "shelving": _shelving,
+    "flooring": _flooring,
+    "tiny": _tiny,
+    "huge": _huge,
+    "lumber": _lumber,
+}
+
+# Cut lists for the 1-D engine, which in turn takes no other profile
+LINEAR_PROFILES = {"lumber"}
+
+
+def generate(profile, piece_count, seed=0):
+    """Returns (stock_length, stock_width, cut_pieces) for a profile with piece_count pieces."""
+    rng = random.Random(f"{profile}:{piece_count}:{seed}")
+    stock_length, stock_width, lines = PROFILES[profile](rng, piece_count)
+    cut_pieces = [{"length": length, "width": width, "quantity": quantity}
+                  for (length, width), quantity in lines.items()]
+    return stock_length, stock_width, cut_pieces
+
+
+def run_case(profile, piece_count, engine, seed=0, memory=True):
+    """Packs one generated cut list with one engine and returns its result row."""
+    stock_length, stock_width, cut_pieces = generate(profile, piece_count, seed)
+    start = time.perf_counter()
+    plan = packing.optimize(stock_length, stock_width, cut_pieces, engine=engine)
+    seconds = time.perf_counter() - start
+
+    peak_bytes = None
+    if memory:
+        # Tracing slows packing down, so memory is measured in a second run
+        tracemalloc.start()
+        packing.optimize(stock_length, stock_width, cut_pieces, engine=engine)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    piece_area = sum(item["length"] * item["width"] * item["quantity"] for item in cut_pieces)
+    return {
+        "profile": profile,
+        "pieces": piece_count,
+        "engine": engine,
+        "seconds": seconds,
+        "peak_bytes": peak_bytes,
+        "boards": plan.board_count,
+        "waste": plan.total_waste,
+        "utilization": piece_area / (plan.board_count * stock_length * stock_width),
+    }
+
+
+def compare(rows, baseline_rows, time_tolerance=TIME_TOLERANCE):
+    """Returns a list of regression messages for rows that did worse than the baseline."""
+    baseline = {(row["profile"], row["pieces"], row["engine"]): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        base = baseline.get((row["profile"], row["pieces"], row["engine"]))
+        if base is None:
+            continue
+        name = f"{row['profile']}/{row['pieces']}/{row['engine']}"
+        if row["boards"] > base["boards"]:
+            regressions.append(f"{name}: {row['boards']} boards, baseline {base['boards']}")
+        elif row["utilization"] < base["utilization"] - 1e-9:
+            regressions.append(f"{name}: utilization {row['utilization']:.2%}, baseline {base['utilization']:.2%}")
+        if (row["seconds"] > base["seconds"] * (1 + time_tolerance)
+                and row["seconds"] - base["seconds"] > MIN_SLOWDOWN):
+            regressions.append(f"{name}: {row['seconds']:.3f} s, baseline {base['seconds']:.3f} s")
+    return regressions
+
+
+HEADER = (f"{'Profile':<9}  {'Pieces':>7}  {'Engine':<10}  {'Seconds':>8}  {'Peak MB':>8}  "
+          f"{'Boards':>7}  {'Waste (sq. in.)':>15}  {'Util.':>6}")
+
+
+def format_row(row):
+    """Returns one result row as a line of the results table."""
+    peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 1e6:.1f}"
+    return (f"{row['profile']:<9}  {row['pieces']:>7}  {row['engine']:<10}  {row['seconds']:>8.3f}  "
+            f"{peak:>8}  {row['boards']:>7}  {row['waste']:>15.2f}  {row['utilization']:>6.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the packing engines on synthetic cut lists.")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="pieces per cut list")
+    parser.add_argument("--engines", nargs="+", choices=packing.ENGINES, default=list(packing.ENGINES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory run")
+    parser.add_argument("--output", help="write the result rows to this JSON file, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="compare against the rows in this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    print(HEADER)
+    rows = []
+    for profile in args.profiles:
+        for size in args.sizes:
+            for engine in args.engines:
+                if (engine == packing.LINEAR) != (profile in LINEAR_PROFILES):
+                    continue
+                rows.append(run_case(profile, size, engine, args.seed, memory=not args.no_memory))
+                print(format_row(rows[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "rows": rows}, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("seed") != args.seed:
+            print(f"warning: baseline was run with seed {baseline.get('seed')}, not {args.seed}")
+        regressions = compare(rows, baseline["rows"], args.time_tolerance)
+        print("")
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Lower bounds on the number of stock boards a cut list needs.
+
+Every plan gets the best of these bounds, so the results can say how far the
+plan is from the best possible, and the search modules (multistart.py,
+exact.py) stop as soon as a plan meets it.
+
+The bounds hold for every engine because kerf only counts between cuts:
+each piece is grown by one kerf in each direction (along the board only,
+for the LINEAR engine) and the board is grown by one kerf too, so a piece
+cut flush with the board's edge still fits. The shelf engine cuts a new
+shelf's first piece that way.
+
+- Area: the boards needed to hold the pieces' area.
+- L2 (Martello and Toth) for 1-D bin packing, over the piece lengths for
+  linear stock. For sheets it runs over the pieces that are more than half
+  as wide as the board whichever way round they go: those all cross the
+  board's centre line, so they sit end to end along the board like 1-D
+  pieces. The same goes for the other direction.
+- Conflict: a set of large pieces no two of which fit on one board.
+
+They work on (piece, count) groups, so a cut list of many thousands of
+copies costs no more than its distinct sizes.
+"""
+
+import bisect
+import math
+
+# Slack for comparisons of float inches, in inches or boards
+_EPSILON = 1e-9
+
+# Largest piece types checked for the conflict bound; each is compared with
+# every type already in the set
+CONFLICT_MAX_TYPES = 200
+
+
+def lower_bound(stock_length, stock_width, groups, kerf, one_dimensional=False):
+    """
+    The best of the bounds below for (piece, count) groups. one_dimensional
+    is for the LINEAR engine, where pieces are as wide as the stock.
+
+    The bounds below take the board already grown by one kerf each way.
+    """
+    length = stock_length + kerf
+    width = stock_width + kerf
+    if one_dimensional:
+        lengths = [(_along(stock_width, piece) + kerf, count) for piece, count in groups]
+        return l2_bound(length, lengths)
+    return max(area_bound(length, width, groups, kerf),
+               sheet_l2_bound(length, width, groups, kerf),
+               conflict_bound(length, width, groups, kerf))
+
+
+def area_bound(stock_length, stock_width, groups, kerf):
+    """Boards needed to hold the pieces' area, each piece grown by one kerf per side."""
+    area = sum((piece["length"] + kerf) * (piece["width"] + kerf) * count for piece, count in groups)
+    return math.ceil(area / (stock_length * stock_width) - _EPSILON)
+
+
+def l2_bound(capacity, sizes):
+    """
+    Martello and Toth's L2 bound for 1-D bin packing of (size, count) pairs
+    into bins of the given capacity.
+
+    For each threshold a up to half the capacity: pieces longer than half
+    need a bin each, pieces longer than capacity - a share it with nothing
+    of length a or more, and the pieces from a up to half the capacity only
+    fit in what the longer pieces leave over or in further bins.
+    """
+    totals = {}
+    for size, count in sizes:
+        if count > 0:
+            totals[size] = totals.get(size, 0) + count
+    if not totals:
+        return 0
+    lengths = sorted(totals)
+    counts = [totals[size] for size in lengths]
+    # Suffix totals: pieces and length from index i to the end
+    pieces_from = [0] * (len(lengths) + 1)
+    length_from = [0] * (len(lengths) + 1)
+    for i in range(len(lengths) - 1, -1, -1):
+        pieces_from[i] = pieces_from[i + 1] + counts[i]
+        length_from[i] = length_from[i + 1] + counts[i] * lengths[i]
+
+    half = capacity / 2
+    big = bisect.bisect_right(lengths, half + _EPSILON)  # first piece longer than half
+    best = math.ceil(length_from[0] / capacity - _EPSILON)
+    for threshold in [0] + lengths[:big]:
+        small = bisect.bisect_left(lengths, threshold)
+        alone = max(bisect.bisect_right(lengths, capacity - threshold + _EPSILON), big)
+        shared_pieces = pieces_from[big] - pieces_from[alone]
+        free = shared_pieces * capacity - (length_from[big] - length_from[alone])
+        extra = (length_from[small] - length_from[big]) - free
+        bins = pieces_from[big] + max(0, math.ceil(extra / capacity - _EPSILON))
+        best = max(best, bins)
+    return best
+
+
+def sheet_l2_bound(stock_length, stock_width, groups, kerf):
+    """
+    L2 over the pieces that cross the board's centre line in one direction
+    whichever way round they are cut, taken in both directions.
+    """
+    best = 0
+    for along, across in ((stock_length, stock_width), (stock_width, stock_length)):
+        sizes = []
+        for piece, count in groups:
+            short = min(piece["length"], piece["width"])
+            long = max(piece["length"], piece["width"])
+            if short + kerf <= across / 2 + _EPSILON:
+                continue
+            # The long side only fits along the board if it cannot go across
+            sizes.append(((long if long + kerf > across + _EPSILON else short) + kerf, count))
+        best = max(best, l2_bound(along, sizes))
+    return best
+
+
+def conflict_bound(stock_length, stock_width, groups, kerf):
+    """
+    Size of a set of pieces no two of which can share a board.
+
+    Large pieces that each take more than half of the board in every
+    orientation need a board apiece. The set is grown greedily from the
+    largest piece type, so it is a valid (if not the largest) bound. Every
+    copy of a type that cannot share a board with itself joins the set.
+    """
+    chosen = []
+    size = 0
+    largest = sorted(groups, key=lambda group: group[0]["length"] * group[0]["width"], reverse=True)
+    for piece, count in largest[:CONFLICT_MAX_TYPES]:
+        if any(can_share(stock_length, stock_width, kerf, piece, other) for other in chosen):
+            continue
+        chosen.append(piece)
+        size += 1 if can_share(stock_length, stock_width, kerf, piece, piece) else count
+    return size
+
+
+def can_share(stock_length, stock_width, kerf, a, b):
+    """True if two pieces fit on one board, in one shelf or in two."""
+    for a_length, a_width in ((a["length"], a["width"]), (a["width"], a["length"])):
+        for b_length, b_width in ((b["length"], b["width"]), (b["width"], b["length"])):
+            # Side by side in one shelf
+            if (a_length + kerf + b_length + kerf <= stock_length
+                    and max(a_width, b_width) + kerf <= stock_width):
+                return True
+            # Stacked in two shelves
+            if (a_width + kerf + b_width + kerf <= stock_width
+                    and max(a_length, b_length) + kerf <= stock_length):
+                return True
+    return False
+
+
+def gap(plan):
+    """
+    Returns (boards over the bound, as a fraction of the bound), or None if
+    the plan has no bound. Raises ValueError if the plan beats its bound,
+    which means the bound is wrong, not that the plan is optimal.
+    """
+    if plan.lower_bound is None:
+        return None
+    over = plan.board_count - plan.lower_bound
+    if over < 0:
+        raise ValueError(f"Plan uses {plan.board_count} boards, below its lower bound of {plan.lower_bound}.")
+    return over, over / plan.lower_bound if plan.lower_bound else 0.0
+
+
+def _along(stock_width, piece):
+    """A linear piece's length along the stock, the way the LINEAR engine turns it."""
+    return piece["length"] if piece["width"] == stock_width else piece["width"]
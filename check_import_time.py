@@ -0,0 +1,108 @@
+"""
+Import-time check.
+
+Imports each module in a fresh interpreter, a few times, and reports the
+fastest wall time of the import itself (interpreter startup not included).
+Fails if a headless module takes longer than its budget, or if importing
+any module loads a PDF library or builds a window: the PDF backends are
+loaded on the first export and the GUIs are built by their entry points.
+
+    python check_import_time.py
+    python check_import_time.py --repeat 10 --budget-ms 30
+
+Exits with status 1 if a check fails.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules that servers and batch workers import; none may pull in a GUI toolkit
+HEADLESS_MODULES = ("packing", "batch", "multistart", "exact", "inventory", "cut_list_import", "plan_cache")
+GUI_MODULES = ("AlmostDone", "Cutlist2")
+
+# Loaded on demand only
+PDF_LIBRARIES = ("reportlab", "fpdf", "pypdf")
+
+HEADLESS_BUDGET_MS = 50
+GUI_BUDGET_MS = 150
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+tkinter = sys.modules.get("tkinter")
+print(json.dumps({{
+    "seconds": seconds,
+    "modules": sorted(name.split(".")[0] for name in sys.modules),
+    "window": bool(tkinter is not None and getattr(tkinter, "_default_root", None) is not None),
+}}))
+"""
+
+
+def measure(module, repeat):
+    """Returns the probe result of the fastest of repeat imports of module."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], cwd=here,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def check(module, result, budget_ms, headless):
+    """Returns a list of failure messages for one module."""
+    failures = []
+    loaded = set(result["modules"])
+    milliseconds = result["seconds"] * 1000
+    if budget_ms is not None and milliseconds > budget_ms:
+        failures.append(f"{module}: import took {milliseconds:.1f} ms, budget {budget_ms} ms")
+    for library in PDF_LIBRARIES:
+        if library in loaded:
+            failures.append(f"{module}: importing it loads {library}")
+    if headless and "tkinter" in loaded:
+        failures.append(f"{module}: importing it loads tkinter")
+    if result["window"]:
+        failures.append(f"{module}: importing it builds a window")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check how long the modules take to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="imports per module; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, default=HEADLESS_BUDGET_MS,
+                        help="time budget for each headless module")
+    parser.add_argument("--gui-budget-ms", type=float, default=GUI_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in HEADLESS_MODULES + GUI_MODULES:
+        headless = module in HEADLESS_MODULES
+        try:
+            result = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            # A GUI module may need a library that is not installed here
+            last_line = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else "no output"
+            failures.append(f"{module}: import failed: {last_line}")
+            continue
+        print(f"{module:<16} {result['seconds'] * 1000:>7.1f} ms")
+        failures.extend(check(module, result, args.budget_ms if headless else args.gui_budget_ms, headless))
+
+    print("")
+    if failures:
+        print(f"{len(failures)} import checks failed:")
+        for message in failures:
+            print(f"  {message}")
+        return 1
+    print("All import checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
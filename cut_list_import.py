@@ -0,0 +1,163 @@
+"""
+Streaming import of cut lists exported by other software.
+
+Reads CSV files and JSON lines files one row at a time, so a list with tens
+of thousands of lines is never held in memory twice. Every row is checked
+as it is read; good rows are merged by (length, width) into the cut list,
+and rejected rows are collected with their line number and the reason, for
+an error report the user can fix and re-import.
+
+CSV files may start with a header naming the length, width and quantity
+columns (in any order, "qty" also works, extra columns are ignored);
+without one the first three columns are taken in that order. A missing
+quantity means 1. JSON lines files hold one {"length", "width", "quantity"}
+object per line. Files saved by the GUI (one JSON list) are read whole and
+checked the same way.
+"""
+
+import csv
+import json
+import math
+import os
+
+CSV_EXTENSIONS = (".csv", ".txt")
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+_COLUMN_NAMES = {"length": "length", "width": "width", "quantity": "quantity", "qty": "quantity"}
+
+
+def import_cut_list(path, cut_pieces=()):
+    """
+    Reads the cut list at path and merges it into cut_pieces.
+
+    Returns (merged cut list, errors). Lines of the same size are merged,
+    keeping the position of the first. errors lists one
+    {"line", "row", "reason"} dict per rejected row. Raises ValueError if
+    the file type is not known.
+    """
+    merged = {}
+    for item in cut_pieces:
+        _merge(merged, item["length"], item["width"], item["quantity"])
+    errors = []
+    for line_number, row in _read_rows(path):
+        try:
+            length, width, quantity = check_row(row)
+        except ValueError as e:
+            errors.append({"line": line_number, "row": row, "reason": str(e)})
+            continue
+        _merge(merged, length, width, quantity)
+    return ([{"length": length, "width": width, "quantity": quantity}
+             for (length, width), quantity in merged.items()], errors)
+
+
+def check_row(row):
+    """Returns (length, width, quantity) of a row dict, or raises ValueError saying what is wrong."""
+    if not isinstance(row, dict):
+        raise ValueError("not a {length, width, quantity} object")
+    values = []
+    for name in ("length", "width"):
+        value = row.get(name)
+        if value is None or value == "":
+            raise ValueError(f"missing {name}")
+        try:
+            if isinstance(value, bool):
+                raise TypeError(value)
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} is not a number: {value!r}")
+        if not math.isfinite(value) or value <= 0:
+            raise ValueError(f"{name} must be positive")
+        values.append(value)
+    quantity = row.get("quantity")
+    if quantity is None or quantity == "":
+        quantity = 1
+    try:
+        if isinstance(quantity, bool):
+            raise TypeError(quantity)
+        number = float(quantity)
+    except (TypeError, ValueError):
+        raise ValueError(f"quantity is not a number: {quantity!r}")
+    if not number.is_integer() or number <= 0:
+        raise ValueError("quantity must be a positive whole number")
+    return values[0], values[1], int(number)
+
+
+def write_error_report(errors, path):
+    """Writes rejected rows to a CSV file with their line numbers, reasons and contents."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "reason", "row"])
+        for error in errors:
+            row = error["row"]
+            writer.writerow([error["line"], error["reason"], row if isinstance(row, str) else json.dumps(row)])
+
+
+def error_report_path(path):
+    """Where the error report for an imported file goes by default."""
+    return os.path.splitext(path)[0] + ".errors.csv"
+
+
+def _merge(merged, length, width, quantity):
+    key = (length, width)
+    merged[key] = merged.get(key, 0) + quantity
+
+
+def _read_rows(path):
+    """Yields (line number, row dict) for every data row of a cut-list file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        yield from _read_csv(path)
+    elif extension in JSON_LINES_EXTENSIONS:
+        yield from _read_json_lines(path)
+    elif extension == ".json":
+        yield from _read_json(path)
+    else:
+        raise ValueError(f"Cannot import {extension or 'extensionless'} files; use CSV, JSON lines or JSON.")
+
+
+def _read_csv(path):
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        columns = None
+        for cells in reader:
+            line_number = reader.line_num
+            if not any(cell.strip() for cell in cells):
+                continue
+            if columns is None:
+                columns = _header_columns(cells)
+                if columns is not None:
+                    continue
+                columns = {"length": 0, "width": 1, "quantity": 2}
+            yield line_number, {name: cells[i].strip() if i < len(cells) else None for name, i in columns.items()}
+
+
+def _header_columns(cells):
+    """Returns {field: column} if cells are a header row, or None if they are data."""
+    columns = {}
+    for i, cell in enumerate(cells):
+        name = _COLUMN_NAMES.get(cell.strip().lower())
+        if name is not None and name not in columns:
+            columns[name] = i
+    if "length" in columns and "width" in columns:
+        return columns
+    return None
+
+
+def _read_json_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = line.strip()  # Rejected by check_row() with the other bad rows
+            yield line_number, row
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("A cut list must be a JSON list of pieces.")
+    yield from enumerate(data, start=1)
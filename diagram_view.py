@@ -0,0 +1,121 @@
+"""
+Virtualized drawing of cutting diagrams on a Tk canvas.
+
+Drawing every board of a large plan creates thousands of canvas items and
+takes seconds. VirtualizedDiagram only draws the boards that are in or near
+the visible part of the canvas, and redraws as the user scrolls. Items of
+boards that leave the view are hidden and reused for the boards coming into
+view instead of being deleted and created again, so the number of items
+stays proportional to the window height, not to the number of boards.
+
+The application supplies a paint_board(view, index, board, y) function that
+draws one board through view.rectangle() and view.text().
+"""
+
+
+class VirtualizedDiagram:
+    """Shows the boards of a plan on a scrollable canvas, drawing only what is near the view."""
+
+    def __init__(self, canvas, paint_board):
+        self.canvas = canvas
+        self.paint_board = paint_board
+        self.boards = []
+        self.top = 0
+        self.pitch = 1
+        self.width = 0
+        self.height = 0
+        self.drawn = {}                             # board index -> item ids
+        self.pool = {"rectangle": [], "text": []}   # hidden items ready for reuse
+        self._items = None                          # items of the board being painted
+        self.items_created = 0                      # canvas items created so far, for the stats
+
+    def show(self, boards, top, pitch, width, height):
+        """
+        Lays out the boards, pitch canvas units apart starting at top, in a
+        scroll region of width x height, and draws the visible ones.
+        """
+        for index in list(self.drawn):
+            self._release(index)
+        self.boards = boards
+        self.top = top
+        self.pitch = pitch
+        self.width = width
+        self.height = height
+        self.canvas.config(scrollregion=(0, 0, width, height))
+        self.refresh()
+
+    def scale(self, x, y, factor):
+        """
+        Stretches the drawn diagram by factor about (x, y) without repainting it.
+
+        This is cheap enough to run on every resize event. Fonts and fixed
+        offsets do not scale, so call show() again once the size settles.
+        """
+        self.canvas.scale("all", x, y, factor, factor)
+        self.top = y + (self.top - y) * factor
+        self.pitch *= factor
+        self.width = x + (self.width - x) * factor
+        self.height = y + (self.height - y) * factor
+        self.canvas.config(scrollregion=(0, 0, self.width, self.height))
+
+    def clear(self):
+        """Removes the diagram and all pooled items."""
+        self.canvas.delete("all")
+        self.boards = []
+        self.drawn = {}
+        self.pool = {"rectangle": [], "text": []}
+
+    def yview(self, *args):
+        """Scrollbar command: scrolls the canvas, then draws the boards that came into view."""
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def refresh(self):
+        """Draws the boards in or near the view and releases the ones that left it."""
+        if not self.boards:
+            return
+        view_top = self.canvas.canvasy(0)
+        view_height = max(self.canvas.winfo_height(), 1)
+        # Keep one screen above and below drawn so short scrolls show no gaps
+        first = max(0, int((view_top - view_height - self.top) // self.pitch))
+        last = min(len(self.boards) - 1, int((view_top + 2 * view_height - self.top) // self.pitch))
+        for index in list(self.drawn):
+            if index < first or index > last:
+                self._release(index)
+        for index in range(first, last + 1):
+            if index not in self.drawn:
+                self._items = self.drawn[index] = []
+                self.paint_board(self, index, self.boards[index], self.top + index * self.pitch)
+        self._items = None
+
+    def rectangle(self, x0, y0, x1, y1, **options):
+        """Draws a rectangle for the board being painted."""
+        return self._acquire("rectangle", (x0, y0, x1, y1), options)
+
+    def text(self, x, y, **options):
+        """Draws a text item for the board being painted. Set anchor, fill and font explicitly."""
+        options.setdefault("anchor", "center")
+        options.setdefault("fill", "black")
+        return self._acquire("text", (x, y), options)
+
+    def _acquire(self, kind, coords, options):
+        pool = self.pool[kind]
+        if pool:
+            item = pool.pop()
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfig(item, state="normal", **options)
+            # Reused items keep their old stacking order; put them back on top
+            self.canvas.tag_raise(item)
+        elif kind == "rectangle":
+            item = self.canvas.create_rectangle(*coords, **options)
+            self.items_created += 1
+        else:
+            item = self.canvas.create_text(*coords, **options)
+            self.items_created += 1
+        self._items.append(item)
+        return item
+
+    def _release(self, index):
+        for item in self.drawn.pop(index):
+            self.canvas.itemconfig(item, state="hidden")
+            self.pool[self.canvas.type(item)].append(item)
@@ -0,0 +1,217 @@
+"""
+Exact branch-and-bound solver for small cut lists.
+
+The greedy engines give a good plan fast but cannot say whether a board
+could be saved. For small jobs (cabinet orders of a few dozen parts) this
+module searches every shelf layout and returns the plan with the fewest
+boards, or, when its time limit runs out first, the best plan found so far.
+
+Layouts follow the shelf model of packing.py: every piece takes its length
+plus one kerf along its shelf, and every shelf takes its height plus one
+kerf across the board. The search opens boards and shelves with the
+engine's own fit rules (packing.fits_new_board() and fits_new_shelf()), so
+a new shelf's first piece may run flush with the board's end.
+
+Pieces are placed largest first, but a new shelf may be opened taller than
+the piece that opens it, to the height of any piece still to come, so a
+shelf sized by a later, taller piece is searched too. "Proven optimal"
+means no such shelf layout uses fewer boards.
+"""
+
+import bisect
+import math
+import time
+
+import packing
+from layout import Board, Shelf
+
+# Cut lists with more pieces than this are left to the greedy engines
+MAX_PIECES = 40
+
+# Upper limit on memoized states, to bound memory on hard instances
+MEMO_LIMIT = 1_000_000
+
+# Nodes between deadline checks
+_CHECK_EVERY = 1024
+
+
+class _Deadline(Exception):
+    """Raised inside the search when the time limit is reached."""
+
+
+class _Done(Exception):
+    """Raised when a plan meets the lower bound, so nothing can beat it."""
+
+
+def solve(stock_length, stock_width, cut_pieces, kerf=packing.BLADE_KERF, time_limit=5.0, max_pieces=MAX_PIECES):
+    """
+    Returns the CutPlan with the fewest boards found within time_limit seconds.
+
+    The plan's proven_optimal is True when the search finished, or when the
+    plan meets the lower bound. Cut lists with more than max_pieces pieces
+    skip the search and get the best greedy plan.
+    """
+    packing.validate_stock(stock_length, stock_width, cut_pieces)
+    deadline = time.monotonic() + time_limit
+    greedy = min((packing.optimize(stock_length, stock_width, cut_pieces, kerf, rule=rule)
+                  for rule in (packing.FIRST_FIT, packing.BEST_FIT)),
+                 key=lambda plan: (plan.board_count, plan.pattern_count))
+
+    pieces = []
+    for piece, count in packing.piece_groups(cut_pieces):
+        pieces.extend([piece] * count)
+    bound = greedy.lower_bound  # see bounds.py
+    if greedy.board_count == bound:
+        greedy.proven_optimal = True
+        return greedy
+    if len(pieces) > max_pieces:
+        return greedy
+
+    search = _Search(stock_length, stock_width, kerf, pieces, greedy.board_count, bound, deadline)
+    finished = search.run()
+    if search.best_boards is None:
+        greedy.proven_optimal = finished
+        greedy.stats["counters"]["search_nodes"] = search.nodes
+        return greedy
+    plan = packing.CutPlan(stock_length, stock_width, kerf, search.best_boards)
+    plan.lower_bound = bound
+    plan.proven_optimal = finished or plan.board_count == bound
+    plan.stats["counters"]["search_nodes"] = search.nodes
+    return plan
+
+
+class _Search:
+    """Depth-first branch and bound over piece placements."""
+
+    def __init__(self, stock_length, stock_width, kerf, pieces, incumbent, bound, deadline):
+        self.stock_length = stock_length
+        self.stock_width = stock_width
+        self.kerf = kerf
+        self.pieces = pieces
+        self.rotated = [{"length": p["width"], "width": p["length"]} for p in pieces]
+        # A board grown by one kerf each way holds the pieces grown the same way (see bounds.py)
+        self.board_area = (stock_length + kerf) * (stock_width + kerf)
+        # Area each remaining suffix of pieces needs at least
+        self.suffix_area = [0] * (len(pieces) + 1)
+        for i in range(len(pieces) - 1, -1, -1):
+            p = pieces[i]
+            self.suffix_area[i] = self.suffix_area[i + 1] + (p["length"] + kerf) * (p["width"] + kerf)
+        # Sorted distinct piece sides from piece i onward: the heights a new shelf may take
+        self.sides_from = [[] for _ in range(len(pieces) + 1)]
+        sides = set()
+        for i in range(len(pieces) - 1, -1, -1):
+            sides.update((pieces[i]["length"], pieces[i]["width"]))
+            self.sides_from[i] = sorted(sides)
+        self.incumbent = incumbent  # fewest boards known so far
+        self.bound = bound
+        self.deadline = deadline
+        self.best_boards = None
+        self.seen = set()
+        self.nodes = 0
+        # Each board is [used_height, [[height, remaining_length, pieces], ...]]
+        self.boards = []
+
+    def run(self):
+        """Searches until done or out of time. Returns True if the search finished."""
+        try:
+            self._place(0)
+        except _Done:
+            pass
+        except _Deadline:
+            return False
+        return True
+
+    def _place(self, i):
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY == 0 and time.monotonic() >= self.deadline:
+            raise _Deadline()
+        if i == len(self.pieces):
+            self._record()
+            return
+        if self._node_bound(i) >= self.incumbent:
+            return
+        key = self._state_key(i)
+        if key in self.seen:
+            return
+        if len(self.seen) >= MEMO_LIMIT:
+            self.seen.clear()
+        self.seen.add(key)
+
+        kerf = self.kerf
+        piece = self.pieces[i]
+        orientations = (piece,) if piece["length"] == piece["width"] else (piece, self.rotated[i])
+        for board in self.boards:
+            # Existing shelves, each orientation that fits
+            for shelf in board[1]:
+                for oriented in orientations:
+                    step = oriented["length"] + kerf
+                    remaining = shelf[1]
+                    if step <= remaining and oriented["width"] <= shelf[0]:
+                        shelf[1] = remaining - step
+                        shelf[2].append(oriented)
+                        self._place(i + 1)
+                        shelf[2].pop()
+                        shelf[1] = remaining
+            # A new shelf on this board
+            for oriented in orientations:
+                used_height = board[0]
+                if not packing.fits_new_shelf(self.stock_length, self.stock_width, kerf, used_height, oriented):
+                    continue
+                for height in self._shelf_heights(i, oriented, used_height):
+                    board[0] = used_height + height + kerf
+                    board[1].append([height, self.stock_length - (oriented["length"] + kerf), [oriented]])
+                    self._place(i + 1)
+                    board[1].pop()
+                    board[0] = used_height
+            if self._node_bound(i) >= self.incumbent:
+                return
+
+        # A new board, which is only worth it if it can still beat the incumbent
+        if len(self.boards) + 1 < self.incumbent:
+            for oriented in orientations:
+                if not packing.fits_new_board(self.stock_length, self.stock_width, kerf, oriented):
+                    continue
+                for height in self._shelf_heights(i, oriented, 0):
+                    self.boards.append([height + kerf,
+                                        [[height, self.stock_length - (oriented["length"] + kerf), [oriented]]]])
+                    self._place(i + 1)
+                    self.boards.pop()
+
+    def _shelf_heights(self, i, oriented, used_height):
+        """
+        Heights a new shelf opened by piece i may take: its own width, or any
+        taller side of a piece still to come that leaves the shelf on the board.
+        """
+        heights = self.sides_from[i]
+        for height in heights[bisect.bisect_left(heights, oriented["width"]):]:
+            if used_height + height + self.kerf > self.stock_width:
+                break
+            yield height
+
+    def _node_bound(self, i):
+        """Boards the plan will need at least, given the open boards and pieces i onward."""
+        free = 0
+        for used_height, shelves in self.boards:
+            free += (self.stock_width + self.kerf - used_height) * (self.stock_length + self.kerf)
+            for height, remaining, _ in shelves:
+                if remaining > 0:
+                    free += (height + self.kerf) * remaining
+        extra = max(self.suffix_area[i] - free, 0)
+        return max(self.bound, len(self.boards) + math.ceil(extra / self.board_area - 1e-9))
+
+    def _state_key(self, i):
+        """Canonical form of the open boards, so board and shelf order do not matter."""
+        return i, tuple(sorted(
+            (used_height, tuple(sorted((height, remaining) for height, remaining, _ in shelves)))
+            for used_height, shelves in self.boards
+        ))
+
+    def _record(self):
+        """Keeps the current complete layout as the new incumbent."""
+        self.incumbent = len(self.boards)
+        self.best_boards = [
+            Board(used_height, [Shelf(height, remaining, list(pieces)) for height, remaining, pieces in shelves])
+            for used_height, shelves in self.boards
+        ]
+        if self.incumbent <= self.bound:
+            raise _Done()
@@ -0,0 +1,85 @@
+"""
+Fixed-point dimensions for exact packing.
+
+Lengths, widths and the kerf are floats in inches, and the engines keep
+subtracting cuts from remaining lengths, so a piece that should fit exactly
+can miss by a rounding error, and the same cut list can hash differently
+depending on how its numbers were written. In fixed-point mode every
+dimension is turned into a whole number of units (1/64" by default) when the
+cut list comes in; the engines run unchanged on ints, so every subtraction
+and comparison is exact, and the plan is converted back to inches for the
+GUIs, reports and to_dict().
+
+A dimension that is not a whole number of units is rejected rather than
+rounded, so the plan always cuts the sizes that were asked for.
+"""
+
+DEFAULT_RESOLUTION = 64  # units per inch
+
+# How far off a whole number of units a dimension may be, in units; covers
+# the float error of decimal inputs such as 0.1 + 0.2
+_TOLERANCE = 1e-6
+
+
+def to_units(inches, resolution=DEFAULT_RESOLUTION):
+    """Returns a dimension as whole units; raises ValueError if it is not a multiple of one unit."""
+    units = inches * resolution
+    nearest = round(units)
+    if abs(units - nearest) > _TOLERANCE:
+        raise ValueError(f"{inches}\" is not a multiple of 1/{resolution}\"; use a finer resolution.")
+    return int(nearest)
+
+
+def cut_list_to_units(cut_pieces, resolution=DEFAULT_RESOLUTION):
+    """Returns a copy of a cut list with the lengths and widths in units."""
+    return [{"length": to_units(item["length"], resolution), "width": to_units(item["width"], resolution),
+             "quantity": item["quantity"]} for item in cut_pieces]
+
+
+def plan_to_inches(plan, resolution=DEFAULT_RESOLUTION):
+    """
+    Converts a CutPlan packed in units back to inches, in place, and returns it.
+
+    Piece dicts are shared between boards, so each record is converted once.
+    Waste is worked out exactly in square units and only then divided.
+    """
+    scale = 1 / resolution
+    area_scale = scale * scale
+    seen = set()
+
+    def first_time(record):
+        if id(record) in seen:
+            return False
+        seen.add(id(record))
+        return True
+
+    def convert_piece(piece):
+        if first_time(piece):
+            piece["length"] *= scale
+            piece["width"] *= scale
+
+    for board in plan.boards:
+        if not first_time(board):
+            continue
+        board.used_height *= scale
+        board.waste *= area_scale
+        for shelf in board.shelves:
+            if first_time(shelf):
+                shelf.height *= scale
+                shelf.remaining_length *= scale
+                for piece in shelf.pieces:
+                    convert_piece(piece)
+        if "placements" in board and first_time(board.placements):
+            placements = board.placements
+            for i in range(len(placements)):
+                placements.xs[i] *= scale
+                placements.ys[i] *= scale
+                convert_piece(placements.pieces[i])
+
+    plan.stock_length *= scale
+    plan.stock_width *= scale
+    plan.kerf *= scale
+    plan.total_waste *= area_scale
+    if plan.linear_waste is not None:
+        plan.linear_waste *= scale
+    return plan
@@ -0,0 +1,261 @@
+"""
+Free-rectangle packing engines: guillotine and MaxRects.
+
+The shelf engine in packing.py throws away the space above a short piece in
+a tall shelf and the strip past the last shelf. These engines instead track
+every free rectangle left on each board.
+
+With guillotine splits every free rectangle is cut in two along a full edge,
+so the resulting layout can always be cut on a panel saw. MaxRects keeps the
+overlapping maximal free rectangles instead, which packs tighter but may
+need plunge or track-saw cuts.
+
+Boards are returned as layout.Board records with an empty shelves list and
+their (x, y, piece) placements. x runs along the stock length and y along
+the stock width, like the shelf layout.
+"""
+
+from bisect import bisect_left, insort
+
+import instrument
+from layout import Board, Placements
+
+
+class FreeRectIndex:
+    """
+    Spatial index over the free rectangles of all boards.
+
+    Rectangles are bucketed by width, and each bucket is sorted by length, so
+    the rectangles that can hold a piece are found with two binary searches
+    per bucket instead of a scan over every rectangle of every board.
+    """
+
+    def __init__(self):
+        self.widths = []     # sorted distinct widths
+        self.buckets = {}    # width -> sorted [(length, rect_id)]
+        self.rects = {}      # rect_id -> (board_index, x, y, length, width)
+        self.by_board = []   # board_index -> set of rect_ids
+        self._next_id = 0
+
+    def add_board(self):
+        """Starts tracking a new board and returns its index."""
+        self.by_board.append(set())
+        return len(self.by_board) - 1
+
+    def add(self, board_index, x, y, length, width):
+        """Adds a free rectangle and returns its id."""
+        rect_id = self._next_id
+        self._next_id += 1
+        self.rects[rect_id] = (board_index, x, y, length, width)
+        self.by_board[board_index].add(rect_id)
+        bucket = self.buckets.get(width)
+        if bucket is None:
+            bucket = self.buckets[width] = []
+            insort(self.widths, width)
+        insort(bucket, (length, rect_id))
+        return rect_id
+
+    def remove(self, rect_id):
+        """Removes a free rectangle."""
+        board_index, _, _, length, width = self.rects.pop(rect_id)
+        self.by_board[board_index].discard(rect_id)
+        bucket = self.buckets[width]
+        del bucket[bisect_left(bucket, (length, rect_id))]
+        if not bucket:
+            del self.buckets[width]
+            del self.widths[bisect_left(self.widths, width)]
+
+    def best_fit(self, length, width):
+        """
+        Returns (short_side_leftover, long_side_leftover, rect_id) for the free
+        rectangle that holds a length x width area with the smallest leftover
+        on its short side, or None if no rectangle is large enough.
+        """
+        best = None
+        for bucket_width in self.widths[bisect_left(self.widths, width):]:
+            bucket = self.buckets[bucket_width]
+            i = bisect_left(bucket, (length,))
+            if i == len(bucket):
+                continue
+            # The first fitting rectangle in a bucket is the tightest on length
+            rect_length, rect_id = bucket[i]
+            leftovers = sorted((rect_length - length, bucket_width - width))
+            key = (leftovers[0], leftovers[1], self.rects[rect_id][0], rect_id)
+            if best is None or key < best:
+                best = key
+        if best is None:
+            return None
+        return best[0], best[1], best[3]
+
+
+def pack(stock_length, stock_width, groups, kerf, maxrects=False, on_group=None, stats=None):
+    """
+    Packs (piece, count) groups onto boards and returns the list of boards.
+
+    Each piece is placed in the free rectangle, on any open board, that it
+    fits with the smallest short-side leftover, trying both orientations.
+    Every piece consumes its size plus one kerf in each direction, but the
+    free space runs one kerf past the board's far end: as on a shelf (see
+    packing.fits_new_shelf()), a piece may end flush with the end of the
+    board, while across the board it still needs its kerf.
+    on_group, if given, is called as on_group(count, board_count) after each
+    group. Boards opened and copied are counted in stats, if given.
+    """
+    if stats is None:
+        stats = instrument.new_stats()
+    boards = []
+    index = FreeRectIndex()
+    for piece, group_count in groups:
+        count = group_count
+        rotated = {"length": piece["width"], "width": piece["length"]}
+        orientations = (piece,) if piece["length"] == piece["width"] else (piece, rotated)
+        while count:
+            choice = _choose(index, orientations, kerf)
+            if choice is not None:
+                _place(index, boards, choice, kerf, maxrects)
+                count -= 1
+                continue
+
+            # Nothing open holds the piece, so start a fresh board and fill it.
+            # The older boards could not take it and have not changed since.
+            board_index = _new_board(index, boards, stock_length + kerf, stock_width)
+            instrument.count(stats, "boards_opened")
+            placed_on_board = 0
+            while count:
+                choice = _choose(index, orientations, kerf)
+                if choice is None:
+                    break
+                _place(index, boards, choice, kerf, maxrects)
+                placed_on_board += 1
+                count -= 1
+
+            # Every further full board of this piece would be packed the same way
+            if count and placed_on_board:
+                repeats = count // placed_on_board
+                for _ in range(repeats):
+                    _copy_board(index, boards, board_index)
+                instrument.count(stats, "boards_copied", repeats)
+                count -= repeats * placed_on_board
+
+        if on_group is not None:
+            on_group(group_count, len(boards))
+
+    for board in boards:
+        board.used_height = max((y + piece["width"] + kerf for _, y, piece in board.placements), default=0)
+    return boards
+
+
+def _new_board(index, boards, stock_length, stock_width):
+    """Opens an empty board whose whole area (length already grown by the kerf) is one free rectangle."""
+    board_index = index.add_board()
+    boards.append(Board(0, [], Placements()))
+    index.add(board_index, 0, 0, stock_length, stock_width)
+    return board_index
+
+
+def _copy_board(index, boards, board_index):
+    """Appends a copy of a board, including its free rectangles."""
+    source = boards[board_index]
+    new_index = index.add_board()
+    boards.append(Board(0, [], source.placements.copy()))
+    for rect_id in sorted(index.by_board[board_index]):
+        _, x, y, length, width = index.rects[rect_id]
+        index.add(new_index, x, y, length, width)
+
+
+def _choose(index, orientations, kerf):
+    """
+    Returns (rect_id, board_index, oriented_piece) for the best placement of
+    a piece over its allowed orientations, or None if nothing fits.
+    """
+    best = None
+    for oriented in orientations:
+        found = index.best_fit(oriented["length"] + kerf, oriented["width"] + kerf)
+        if found is None:
+            continue
+        short, long, rect_id = found
+        board_index = index.rects[rect_id][0]
+        key = (short, long, board_index)
+        if best is None or key < best[0]:
+            best = (key, rect_id, oriented)
+    if best is None:
+        return None
+    _, rect_id, oriented = best
+    return rect_id, index.rects[rect_id][0], oriented
+
+
+def _place(index, boards, choice, kerf, maxrects):
+    """Places a piece in the chosen free rectangle and updates the free space."""
+    rect_id, board_index, piece = choice
+    _, x, y, rect_length, rect_width = index.rects[rect_id]
+    boards[board_index].placements.append((x, y, piece))
+    used_length = piece["length"] + kerf
+    used_width = piece["width"] + kerf
+    if maxrects:
+        _split_maxrects(index, board_index, x, y, used_length, used_width)
+    else:
+        index.remove(rect_id)
+        _split_guillotine(index, board_index, x, y, rect_length, rect_width, used_length, used_width)
+
+
+def _split_guillotine(index, board_index, x, y, rect_length, rect_width, used_length, used_width):
+    """
+    Splits the rest of a free rectangle into two with one edge-to-edge cut.
+
+    The cut runs along the axis with the longer leftover, so the strip beside
+    the piece stays narrow and the other rectangle keeps the full span.
+    """
+    right_length = rect_length - used_length
+    bottom_width = rect_width - used_width
+    if right_length >= bottom_width:
+        # Rip along the full length below the piece, then crosscut beside it
+        right = (x + used_length, y, right_length, used_width)
+        bottom = (x, y + used_width, rect_length, bottom_width)
+    else:
+        # Crosscut the full width beside the piece, then rip below it
+        right = (x + used_length, y, right_length, rect_width)
+        bottom = (x, y + used_width, used_length, bottom_width)
+    for rx, ry, length, width in (right, bottom):
+        if length > 0 and width > 0:
+            index.add(board_index, rx, ry, length, width)
+
+
+def _split_maxrects(index, board_index, x, y, used_length, used_width):
+    """
+    Splits every free rectangle of the board that overlaps the placed piece
+    into its maximal leftover rectangles, then drops any contained in another.
+    """
+    right_edge = x + used_length
+    bottom_edge = y + used_width
+    new_rects = []
+    for rect_id in list(index.by_board[board_index]):
+        _, rx, ry, length, width = index.rects[rect_id]
+        if rx >= right_edge or x >= rx + length or ry >= bottom_edge or y >= ry + width:
+            continue
+        index.remove(rect_id)
+        if x > rx:
+            new_rects.append((rx, ry, x - rx, width))
+        if right_edge < rx + length:
+            new_rects.append((right_edge, ry, rx + length - right_edge, width))
+        if y > ry:
+            new_rects.append((rx, ry, length, y - ry))
+        if bottom_edge < ry + width:
+            new_rects.append((rx, bottom_edge, length, ry + width - bottom_edge))
+
+    existing = [index.rects[rect_id][1:] for rect_id in index.by_board[board_index]]
+    kept = []
+    for i, rect in enumerate(new_rects):
+        if any(_contains(other, rect) for other in existing):
+            continue
+        if any(_contains(other, rect) and (other != rect or j < i) for j, other in enumerate(new_rects) if j != i):
+            continue
+        kept.append(rect)
+    for rx, ry, length, width in kept:
+        index.add(board_index, rx, ry, length, width)
+
+
+def _contains(outer, inner):
+    """True if rectangle outer (x, y, length, width) contains rectangle inner."""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[0] + outer[2] >= inner[0] + inner[2]
+            and outer[1] + outer[3] >= inner[1] + inner[3])
@@ -0,0 +1,70 @@
+"""
+Per-phase timing and counters for optimizer runs.
+
+Every CutPlan carries a stats dict:
+
+    {"phases": {"grouping": 0.001, "packing": 0.153, ...},   # seconds
+     "counters": {"pieces": 48497, "shelves_probed": 210331, ...}}
+
+The engines fill it in as they go; the GUIs add their drawing and export
+phases. Timing a phase costs two perf_counter() calls and counters are
+bumped once per piece type or board, never per piece, so this stays on in
+production.
+
+log() appends a record as one JSON line to a file, given directly or
+through the CUTLIST_STATS_LOG environment variable.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STATS_LOG_ENV = "CUTLIST_STATS_LOG"
+
+_log_lock = threading.Lock()
+
+
+def new_stats():
+    """Returns an empty stats dict."""
+    return {"phases": {}, "counters": {}}
+
+
+@contextmanager
+def phase(stats, name):
+    """Adds the wall time of the with block to stats["phases"][name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = stats["phases"]
+        phases[name] = phases.get(name, 0) + time.perf_counter() - start
+
+
+def count(stats, name, n=1):
+    """Adds n to stats["counters"][name]."""
+    counters = stats["counters"]
+    counters[name] = counters.get(name, 0) + n
+
+
+def merge(stats, other):
+    """Adds the phases and counters of other into stats."""
+    for name, seconds in other["phases"].items():
+        stats["phases"][name] = stats["phases"].get(name, 0) + seconds
+    for name, n in other["counters"].items():
+        count(stats, name, n)
+
+
+def log(record, path=None):
+    """
+    Appends record as a JSON line to path, or to the file named by the
+    CUTLIST_STATS_LOG environment variable. Does nothing if neither is set.
+    """
+    path = path or os.environ.get(STATS_LOG_ENV)
+    if not path:
+        return
+    line = json.dumps(dict(record, time=time.time()))
+    with _log_lock:
+        with open(path, "a") as f:
+            f.write(line + "\n")
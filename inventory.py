@@ -0,0 +1,361 @@
+"""
+Planning against a stock inventory and a rack of remnants.
+
+packing.optimize() cuts everything from one stock size. Here the yard's
+stock is a list of sizes with a cost per board and, optionally, a quantity
+on hand:
+
+    [{"length": 96, "width": 48, "cost": 52.0, "quantity": 40},
+     {"length": 48, "width": 24, "cost": 15.0}]          # no quantity: unlimited
+
+plus a RemnantStore of offcuts kept from earlier jobs, which cost nothing.
+
+optimize() builds the plan a few boards at a time. Remnants go first: the
+largest piece still to cut picks the smallest offcut that takes it, and that
+offcut is filled. Then every stock size packs the remaining pieces, and the
+size with the lowest cost per square inch of pieces on its well-filled boards
+wins those boards. The half-empty boards at the end of a plan are planned
+again in the next round, where a smaller, cheaper size may take them.
+
+A finished plan's usable offcuts can go back on the rack with
+RemnantStore.record(), which also takes the remnants it used off the rack.
+"""
+
+import json
+from bisect import bisect_left, insort
+
+import instrument
+import packing
+
+# Offcuts smaller than this either way are thrown away, not kept
+REMNANT_MIN_LENGTH = 12
+REMNANT_MIN_WIDTH = 3
+
+# Boards at least this full are kept when their stock size is picked; emptier
+# ones are planned again, possibly on another size
+FULL_BOARD_FILL = 0.8
+
+
+class RemnantStore:
+    """
+    Offcuts on the rack, counted by size.
+
+    Sizes are kept as (long side, short side), in a list sorted by short side
+    so best_fit() only looks at offcuts wide enough for the piece.
+    """
+
+    def __init__(self, remnants=()):
+        self.counts = {}  # (long side, short side) -> offcuts on hand
+        self.sizes = []   # (short side, long side) of every size on hand, sorted
+        for length, width in remnants:
+            self.add(length, width)
+
+    @staticmethod
+    def _key(length, width):
+        return (length, width) if length >= width else (width, length)
+
+    def add(self, length, width, count=1):
+        """Puts count offcuts of this size on the rack."""
+        key = self._key(length, width)
+        if key not in self.counts:
+            self.counts[key] = 0
+            insort(self.sizes, (key[1], key[0]))
+        self.counts[key] += count
+
+    def remove(self, length, width, count=1):
+        """Takes count offcuts of this size off the rack; raises ValueError if there are not that many."""
+        key = self._key(length, width)
+        on_hand = self.counts.get(key, 0)
+        if on_hand < count:
+            raise ValueError(f"Only {on_hand} remnants of {key[0]}\" x {key[1]}\" on hand.")
+        if on_hand == count:
+            del self.counts[key]
+            del self.sizes[bisect_left(self.sizes, (key[1], key[0]))]
+        else:
+            self.counts[key] = on_hand - count
+
+    def best_fit(self, length, width, kerf=0):
+        """
+        Returns (length, width) of the smallest offcut a piece fits on, with
+        its kerf, or None. Offcuts are returned long side first.
+        """
+        piece_long, piece_short = self._key(length + kerf, width + kerf)
+        best = None
+        for short, long in self.sizes[bisect_left(self.sizes, (piece_short, float("-inf"))):]:
+            if best is not None and short * piece_long >= best[0] * best[1]:
+                break  # Every offcut from here on is at least this large
+            if long >= piece_long and (best is None or long * short < best[0] * best[1]):
+                best = (long, short)
+        return best
+
+    def copy(self):
+        copy = RemnantStore()
+        copy.counts = dict(self.counts)
+        copy.sizes = list(self.sizes)
+        return copy
+
+    def record(self, plan):
+        """Takes the remnants a StockPlan used off the rack and puts its usable offcuts on it."""
+        for length, width in plan.remnants_used:
+            self.remove(length, width)
+        for length, width in plan.offcuts():
+            self.add(length, width)
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def to_list(self):
+        """Returns the rack as {"length", "width", "quantity"} lines, the cut-list format."""
+        return [{"length": length, "width": width, "quantity": count}
+                for (length, width), count in sorted(self.counts.items())]
+
+    @classmethod
+    def from_list(cls, lines):
+        store = cls()
+        for line in lines:
+            store.add(line["length"], line["width"], line.get("quantity", 1))
+        return store
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_list(), f, indent=4)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_list(json.load(f))
+
+
+class StockPlan:
+    """
+    A plan cut from several stock sizes. sections lists one
+    {"stock", "plan", "remnant"} dict per size used, where plan is the
+    CutPlan of the boards cut from that size.
+    """
+
+    def __init__(self, sections, remnants_used, kerf):
+        self.sections = sections
+        self.remnants_used = remnants_used  # (length, width) of every remnant cut, long side first
+        self.kerf = kerf
+        self.stats = instrument.new_stats()
+        for section in sections:
+            instrument.merge(self.stats, section["plan"].stats)
+
+    @property
+    def board_count(self):
+        return sum(section["plan"].board_count for section in self.sections)
+
+    @property
+    def total_waste(self):
+        return sum(section["plan"].total_waste for section in self.sections)
+
+    @property
+    def cost(self):
+        """What the stock boards cost; remnants are free."""
+        return sum(section["stock"].get("cost", 0) * section["plan"].board_count for section in self.sections)
+
+    def offcuts(self, min_length=REMNANT_MIN_LENGTH, min_width=REMNANT_MIN_WIDTH):
+        """Returns (length, width) of every offcut worth keeping, long side first."""
+        kept = []
+        for section in self.sections:
+            for length, width in board_offcuts(section["plan"]):
+                long, short = (length, width) if length >= width else (width, length)
+                if long >= min_length and short >= min_width:
+                    kept.append((long, short))
+        return kept
+
+    def summary(self):
+        """Returns the one-line summary shown in the results label and reports."""
+        sizes = ", ".join(
+            f"{section['plan'].board_count} x {section['stock']['length']}\" x {section['stock']['width']}\""
+            + (" remnant" if section["remnant"] else "")
+            for section in self.sections
+        )
+        return (f"Optimization Results: {self.board_count} Boards Used ({sizes}), "
+                f"Total Waste: {self.total_waste:.2f} sq. in., Cost: {self.cost:.2f}")
+
+    def to_dict(self):
+        """Returns the plan as plain JSON-serializable data, one entry per stock size."""
+        return {
+            "kerf": self.kerf,
+            "board_count": self.board_count,
+            "total_waste": self.total_waste,
+            "cost": self.cost,
+            "remnants_used": [list(size) for size in self.remnants_used],
+            "sections": [dict(section["plan"].to_dict(), stock=section["stock"], remnant=section["remnant"])
+                         for section in self.sections],
+        }
+
+
+def validate_inventory(stock, cut_pieces):
+    """Raises ValueError if the stock inventory or the cut list are unusable."""
+    if not stock or not cut_pieces:
+        raise ValueError("Please enter stock board dimensions and add pieces.")
+    for item in stock:
+        if item["length"] <= 0 or item["width"] <= 0:
+            raise ValueError(f"Stock board {item['length']}\" x {item['width']}\" has no area.")
+        if item.get("cost", 0) < 0 or (item.get("quantity") or 0) < 0:
+            raise ValueError(f"Stock board {item['length']}\" x {item['width']}\" has a negative cost or quantity.")
+
+
+def board_offcuts(plan):
+    """
+    Yields (length, width) of the rectangles left over on each board of a
+    CutPlan: the strip past the last shelf or piece, and the end of each shelf.
+    """
+    for board in plan.boards:
+        if "placements" in board:
+            top = max((y + piece["width"] + plan.kerf for _, y, piece in board.placements), default=0)
+            if top < plan.stock_width:
+                yield plan.stock_length, plan.stock_width - top
+            continue
+        if board.used_height < plan.stock_width:
+            yield plan.stock_length, plan.stock_width - board.used_height
+        for shelf in board.shelves:
+            if shelf.remaining_length > 0:
+                yield shelf.remaining_length, shelf.height
+
+
+def optimize(stock, cut_pieces, kerf=packing.BLADE_KERF, rule=packing.FIRST_FIT, engine=packing.SHELF,
+             remnants=None):
+    """
+    Packs a cut list onto the cheapest mix of stock sizes and remnants and
+    returns a StockPlan. The remnant store is not changed; pass the plan to
+    its record() method once the plan is cut.
+
+    The mix is compared with cutting all new boards from a single size, and
+    the cheaper plan wins, then the one with fewer boards.
+    """
+    validate_inventory(stock, cut_pieces)
+    groups = packing.piece_groups(cut_pieces)
+    best = None
+    error = None
+    for allowed in [range(len(stock))] + ([[i] for i in range(len(stock))] if len(stock) > 1 else []):
+        try:
+            plan = _plan(stock, allowed, groups, kerf, rule, engine, remnants)
+        except ValueError as e:
+            error = error or e
+            continue
+        if best is None or (plan.cost, plan.board_count) < (best.cost, best.board_count):
+            best = plan
+    if best is None:
+        raise error
+    return best
+
+
+def _plan(stock, allowed, groups, kerf, rule, engine, remnants):
+    """Builds a StockPlan from remnants and the stock sizes at the allowed indexes."""
+    # Pieces to cut, by (long side, short side), largest first
+    demand = {}
+    for piece, count in groups:
+        key = RemnantStore._key(piece["length"], piece["width"])
+        if key in demand:
+            demand[key][1] += count
+        else:
+            demand[key] = [piece, count]
+    on_hand = [item.get("quantity") for item in stock]
+    rack = remnants.copy() if remnants is not None else RemnantStore()
+    remnants_used = []
+    chosen = {}  # ("stock", index) or ("remnant", size) -> boards
+
+    while any(count for _, count in demand.values()):
+        groups = [(piece, count) for piece, count in demand.values() if count]
+        remnant = _pick_remnant(rack, groups, kerf, engine)
+        if remnant is not None:
+            length, width = remnant
+            # No more of a piece than its area allows can go on one offcut
+            capped = [(piece, min(count, int(length * width // (piece["length"] * piece["width"])) or 1))
+                      for piece, count in groups if _fits(piece, length, width, kerf, engine)]
+            board = packing.pack_groups(length, width, capped, kerf, rule, engine).boards[0]
+            rack.remove(length, width)
+            remnants_used.append(remnant)
+            _take(demand, [board], kerf)
+            chosen.setdefault(("remnant", remnant), []).append(board)
+            continue
+
+        best = None
+        for i in allowed:
+            item = stock[i]
+            if on_hand[i] == 0:
+                continue
+            fitting = [(piece, count) for piece, count in groups
+                       if _fits(piece, item["length"], item["width"], kerf, engine)]
+            if not fitting:
+                continue
+            plan = packing.pack_groups(item["length"], item["width"], fitting, kerf, rule, engine)
+            boards, area = _full_boards(plan, on_hand[i])
+            score = (item.get("cost", 0) * len(boards) / area, -area)
+            if best is None or score < best[0]:
+                best = (score, i, boards)
+        if best is None:
+            left = sum(count for _, count in groups)
+            raise ValueError(f"Not enough stock on hand to cut the remaining {left} pieces.")
+        _, i, boards = best
+        if on_hand[i] is not None:
+            on_hand[i] -= len(boards)
+        _take(demand, boards, kerf)
+        chosen.setdefault(("stock", i), []).extend(boards)
+
+    sections = []
+    for (kind, key), boards in chosen.items():
+        if kind == "remnant":
+            item = {"length": key[0], "width": key[1], "cost": 0}
+        else:
+            item = stock[key]
+        plan = packing.CutPlan(item["length"], item["width"], kerf, boards)
+        sections.append({"stock": item, "plan": plan, "remnant": kind == "remnant"})
+    return StockPlan(sections, remnants_used, kerf)
+
+
+def _fits(piece, length, width, kerf, engine):
+    """True if a piece can be cut from a board of this size by the engine."""
+    if engine == packing.LINEAR:
+        if piece["width"] == width:
+            return piece["length"] + kerf <= length
+        return piece["length"] == width and piece["width"] + kerf <= length
+    try:
+        packing.check_piece_fits(length, width, kerf, piece)
+    except ValueError:
+        return False
+    return True
+
+
+def _pick_remnant(rack, groups, kerf, engine):
+    """Returns the smallest offcut on the rack that the largest piece it can take fits on, or None."""
+    if not len(rack):
+        return None
+    for piece, _ in groups:
+        if engine == packing.LINEAR:
+            # Linear pieces need the full width of the offcut and a kerf on their length only
+            remnant = rack.best_fit(piece["length"] + kerf, piece["width"])
+        else:
+            remnant = rack.best_fit(piece["length"], piece["width"], kerf)
+        if remnant is not None and _fits(piece, remnant[0], remnant[1], kerf, engine):
+            return remnant
+    return None
+
+
+def _full_boards(plan, on_hand):
+    """
+    Returns (boards, piece area) for the boards of a plan to keep: those at
+    least FULL_BOARD_FILL full or, if there are none, those nearly as full
+    as the fullest board. No more than are on hand.
+    """
+    filled = []
+    for board in plan.boards:
+        area = sum(piece["length"] * piece["width"] for _, _, piece in packing.board_pieces(board, plan.kerf))
+        filled.append((board, area))
+    threshold = FULL_BOARD_FILL * plan.stock_length * plan.stock_width
+    if all(area < threshold for _, area in filled):
+        threshold = FULL_BOARD_FILL * max(area for _, area in filled)
+    kept = [(board, area) for board, area in filled if area >= threshold]
+    if on_hand is not None:
+        kept = kept[:on_hand]
+    return [board for board, _ in kept], sum(area for _, area in kept)
+
+
+def _take(demand, boards, kerf):
+    """Takes the pieces cut on boards off the demand."""
+    for board in boards:
+        for _, _, piece in packing.board_pieces(board, kerf):
+            demand[RemnantStore._key(piece["length"], piece["width"])][1] -= 1
@@ -0,0 +1,123 @@
+"""
+Compact records for the boards and shelves of a cutting plan.
+
+A large plan holds tens of thousands of placements, so boards and shelves
+are slotted objects rather than dicts. Pieces are never copied: a shelf
+lists references to the shared piece dicts of its piece types, and the
+free-rectangle engines keep their coordinates in flat arrays, so a
+placement costs a pointer, or a pointer and two doubles.
+
+The records also answer the dict-style lookups (board["shelves"],
+"placements" in board, board.get(...)) that the drawing and report code
+was written against. The engines use the attributes, which are faster.
+"""
+
+from array import array
+
+
+def cut_copies(remaining_length, step, limit):
+    """
+    Cuts up to limit lengths of step (piece plus kerf) off remaining_length,
+    one at a time, and returns (copies cut, length left).
+
+    Subtracting one cut at a time, rather than dividing, keeps the float
+    results identical to placing the copies one by one, exact fits included.
+    """
+    copies = 0
+    while copies < limit and step <= remaining_length:
+        remaining_length -= step
+        copies += 1
+    return copies, remaining_length
+
+
+class _Record:
+    """Dict-style access to a record's slots. A slot that was never set counts as a missing key."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key in self.__slots__ and hasattr(self, key):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            return getattr(self, key, default)
+        return default
+
+
+class Shelf(_Record):
+    """A row of pieces across a board; its height is set by its first piece."""
+
+    __slots__ = ("height", "remaining_length", "pieces")
+
+    def __init__(self, height, remaining_length, pieces):
+        self.height = height
+        self.remaining_length = remaining_length
+        self.pieces = pieces
+
+    def copy(self):
+        """Returns an independent copy that shares the piece dicts."""
+        return Shelf(self.height, self.remaining_length, list(self.pieces))
+
+
+class Placements:
+    """(x, y, piece) placements kept as two coordinate arrays and a list of piece references."""
+
+    __slots__ = ("xs", "ys", "pieces")
+
+    def __init__(self, placements=()):
+        self.xs = array("d")
+        self.ys = array("d")
+        self.pieces = []
+        for placement in placements:
+            self.append(placement)
+
+    def append(self, placement):
+        x, y, piece = placement
+        self.xs.append(x)
+        self.ys.append(y)
+        self.pieces.append(piece)
+
+    def copy(self):
+        """Returns an independent copy that shares the piece dicts."""
+        copy = Placements()
+        copy.xs = array("d", self.xs)
+        copy.ys = array("d", self.ys)
+        copy.pieces = list(self.pieces)
+        return copy
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def __iter__(self):
+        return zip(self.xs, self.ys, self.pieces)
+
+
+class Board(_Record):
+    """
+    One stock board. Shelf boards list their shelves; boards from the
+    free-rectangle engines have no shelves and carry placements instead.
+    waste is set once the plan is complete.
+    """
+
+    __slots__ = ("used_height", "shelves", "placements", "waste")
+
+    def __init__(self, used_height, shelves, placements=None):
+        self.used_height = used_height
+        self.shelves = shelves
+        if placements is not None:
+            self.placements = placements
+
+    def copy(self):
+        """Returns an independent copy that shares the piece dicts."""
+        placements = self.placements.copy() if hasattr(self, "placements") else None
+        return Board(self.used_height, [shelf.copy() for shelf in self.shelves], placements)
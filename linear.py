@@ -0,0 +1,274 @@
+"""
+1-D cutting for linear stock (2x4s, trim, flooring strips).
+
+When every piece is as wide as the stock, only crosscuts are needed and the
+problem is the classic cutting-stock problem. Each board gets one shelf the
+full width of the stock, holding its pieces end to end with a kerf after
+each cut, so plans from this engine draw, report and save like shelf plans.
+
+Two packers are tried:
+
+- First-Fit-Decreasing: piece types go longest first, and a max segment tree
+  over the boards' remaining lengths finds the first board a piece fits in
+  O(log n). Runs of full boards of one length are cloned in one step.
+- Patterns, for cut lists with few distinct lengths and high quantities:
+  repeatedly find the cutting pattern that uses the most of a board (a
+  bounded subset-sum over the remaining quantities, in 1/64" units, or in
+  the plan's own units in fixed-point mode) and cut
+  it as many times as the quantities allow. Once the best pattern is no
+  longer tight, the remaining pieces go to First-Fit-Decreasing.
+
+The plan with fewer boards wins; on a tie, the one with fewer patterns.
+"""
+
+import math
+
+import instrument
+from layout import Board, Shelf, cut_copies
+from shelf_index import MaxTree
+
+# Pattern lengths are worked out in these fractions of an inch
+PATTERN_UNITS = 64
+
+# Cut lists with more distinct lengths than this only get First-Fit-Decreasing
+PATTERN_MAX_TYPES = 40
+
+# Patterns using less of the board than this are left to First-Fit-Decreasing
+PATTERN_MIN_UTILIZATION = 0.9
+
+
+def pack(stock_length, stock_width, groups, kerf, on_group=None, stats=None):
+    """
+    Packs (piece, count) groups onto linear stock and returns the boards.
+
+    Every piece must be as wide as the stock, either way round; raises
+    ValueError otherwise, or if a piece is longer than the stock.
+    """
+    if stats is None:
+        stats = instrument.new_stats()
+    types = _piece_types(stock_length, stock_width, groups, kerf)
+    best_stats = instrument.new_stats()
+    best = _ffd(stock_length, stock_width, types, kerf, [], [], on_group, best_stats)
+    if _board_count(*best) > 1 and len(types) <= PATTERN_MAX_TYPES:
+        pattern_stats = instrument.new_stats()
+        candidate = _pack_patterns(stock_length, stock_width, types, kerf, on_group, pattern_stats)
+        if (_board_count(*candidate), _layout_count(candidate[0])) < (_board_count(*best), _layout_count(best[0])):
+            best, best_stats = candidate, pattern_stats
+        else:
+            instrument.count(best_stats, "patterns_generated", pattern_stats["counters"].get("patterns_generated", 0))
+    instrument.merge(stats, best_stats)
+    return _expand(*best)
+
+
+def linear_waste(stock_length, patterns):
+    """Returns the stock length not cut into pieces, kerf included, over a plan's patterns."""
+    waste = 0
+    for pattern in patterns:
+        used = sum(piece["length"] for shelf in pattern["board"].shelves for piece in shelf.pieces)
+        waste += (stock_length - used) * pattern["count"]
+    return waste
+
+
+def _ffd(stock_length, stock_width, types, kerf, boards, runs, on_group, stats):
+    """
+    First-Fit-Decreasing over (piece, count) types sorted longest first,
+    continuing from the given boards and runs. Returns (boards, runs).
+
+    Boards that no piece fits in any more and that repeat the board before
+    them are not built here: runs lists them as (index, repeats), meaning
+    boards[index] is followed by repeats copies of itself. That keeps both
+    packers cheap; only the winner is expanded into its full board list.
+    """
+    if not types:
+        return boards, runs
+    shortest = types[-1][0]["length"] + kerf
+    tree = MaxTree()
+    for i, board in enumerate(boards):
+        tree.set(i, board.shelves[0].remaining_length)
+    for piece, count in types:
+        step = piece["length"] + kerf
+        placed = count
+        position = 0
+        while count:
+            position = tree.first_at_least(position, step, len(boards))
+            if position is None:
+                break
+            instrument.count(stats, "boards_probed")
+            shelf = boards[position].shelves[0]
+            copies, shelf.remaining_length = cut_copies(shelf.remaining_length, step, count)
+            shelf.pieces.extend([piece] * copies)
+            tree.set(position, shelf.remaining_length)
+            count -= copies
+            position += 1
+
+        per_board, _ = cut_copies(stock_length, step, count)
+        while count:
+            copies, remaining_length = cut_copies(stock_length, step, count)
+            # Every further full board of this piece is cut the same way
+            times = count // per_board if copies == per_board else 1
+            first = len(boards)
+            _add_boards(boards, runs, Board(stock_width, [Shelf(stock_width, remaining_length, [piece] * copies)]),
+                        times, shortest)
+            for i in range(first, len(boards)):
+                tree.set(i, remaining_length)
+            instrument.count(stats, "boards_opened")
+            instrument.count(stats, "boards_copied", times - 1)
+            count -= copies * times
+        if on_group is not None:
+            on_group(placed, _board_count(boards, runs))
+    return boards, runs
+
+
+def _add_boards(boards, runs, board, times, shortest):
+    """
+    Adds times boards laid out like board. If a cut of length shortest still
+    fits in the offcut the copies are built, otherwise they become a run.
+    """
+    boards.append(board)
+    if times == 1:
+        return
+    if board.shelves[0].remaining_length < shortest:
+        runs.append((len(boards) - 1, times - 1))
+    else:
+        boards.extend(board.copy() for _ in range(times - 1))
+
+
+def _board_count(boards, runs):
+    """Number of boards once the runs are expanded."""
+    return len(boards) + sum(repeats for _, repeats in runs)
+
+
+def _expand(boards, runs):
+    """Returns the full board list, with every run's copies after its board."""
+    if not runs:
+        return boards
+    repeats = dict(runs)
+    expanded = []
+    for i, board in enumerate(boards):
+        expanded.append(board)
+        if i in repeats:
+            shelf = board.shelves[0]
+            expanded.extend(Board(board.used_height, [Shelf(shelf.height, shelf.remaining_length, list(shelf.pieces))])
+                            for _ in range(repeats[i]))
+    return expanded
+
+
+def _piece_types(stock_length, stock_width, groups, kerf):
+    """Returns the groups with every piece turned to run along the stock, longest first."""
+    types = []
+    for piece, count in groups:
+        if piece["width"] == stock_width:
+            oriented = piece
+        elif piece["length"] == stock_width:
+            oriented = {"length": piece["width"], "width": piece["length"]}
+        else:
+            raise ValueError(
+                f"Cannot cut piece {piece['length']}\" x {piece['width']}\" in linear mode as it is not "
+                f"as wide as the stock board ({stock_width}\")."
+            )
+        if oriented["length"] + kerf > stock_length:
+            raise ValueError(
+                f"Cannot cut piece {piece['length']}\" x {piece['width']}\" as it is too long "
+                f"for the stock board ({stock_length}\")."
+            )
+        types.append((oriented, count))
+    types.sort(key=lambda item: item[0]["length"], reverse=True)
+    return types
+
+
+def _layout_count(boards):
+    """Number of distinct board layouts."""
+    return len({tuple(piece["length"] for piece in board.shelves[0].pieces) for board in boards})
+
+
+def _units(length, per_inch):
+    """A cut length in pattern units, rounded up so that patterns never overfill a board."""
+    units = length * per_inch
+    nearest = round(units)
+    return nearest if abs(units - nearest) < 1e-9 else math.ceil(units)
+
+
+def _pack_patterns(stock_length, stock_width, types, kerf, on_group, stats):
+    """
+    Cuts the most frequent tight pattern over and over, then finishes with
+    First-Fit-Decreasing. Returns (boards, runs) like _ffd().
+    """
+    demand = [count for _, count in types]
+    steps = [piece["length"] + kerf for piece, _ in types]
+    # Plans packed in fixed-point units (see fixed_point.py) are already whole numbers
+    exact = isinstance(stock_length, int) and all(isinstance(step, int) for step in steps)
+    per_inch = 1 if exact else PATTERN_UNITS
+    weights = [_units(step, per_inch) for step in steps]
+    capacity = int(stock_length * per_inch + 1e-9)
+    boards = []
+    runs = []
+    while any(demand):
+        pattern = _frequent_pattern(weights, demand, capacity)
+        if pattern is None:
+            break
+        repeats = min(demand[i] // copies for i, copies in pattern.items())
+        pieces = []
+        remaining_length = stock_length
+        for i in sorted(pattern):
+            pieces.extend([types[i][0]] * pattern[i])
+            remaining_length -= pattern[i] * steps[i]
+            demand[i] -= pattern[i] * repeats
+        board = Board(stock_width, [Shelf(stock_width, remaining_length, pieces)])
+        _add_boards(boards, runs, board, repeats, steps[-1])
+        instrument.count(stats, "patterns_generated")
+        instrument.count(stats, "boards_opened")
+        instrument.count(stats, "boards_copied", repeats - 1)
+        if on_group is not None:
+            # Lets the caller cancel; the pieces were already counted by the FFD run
+            on_group(0, _board_count(boards, runs))
+    rest = [(piece, count) for (piece, _), count in zip(types, demand) if count]
+    return _ffd(stock_length, stock_width, rest, kerf, boards, runs, None, stats)
+
+
+def _frequent_pattern(weights, demand, capacity):
+    """
+    Returns the tight pattern that can be cut the most times, as {type index:
+    copies}, or None if even a single board can no longer be cut tightly.
+
+    Tries patterns that can be repeated at least times times, halving times
+    from the largest quantity down to 1, and takes the first one that uses
+    PATTERN_MIN_UTILIZATION of the board.
+    """
+    times = max(demand)
+    while times:
+        pattern, used = _best_pattern(weights, [count // times for count in demand], capacity)
+        if used >= PATTERN_MIN_UTILIZATION * capacity:
+            return pattern
+        times //= 2
+    return None
+
+
+def _best_pattern(weights, demand, capacity):
+    """
+    Returns ({type index: copies}, used units) for the pattern that fills the
+    most of capacity without cutting more of a type than is still wanted.
+
+    A bounded subset-sum over a bitset: bit s of reachable is set when some
+    pattern uses exactly s units. Each type is split into chunks of 1, 2, 4,
+    ... copies so that every count up to its bound is a sum of chunks.
+    """
+    mask = (1 << (capacity + 1)) - 1
+    reachable = 1
+    chunks = []  # (type index, copies, reachable before the chunk)
+    for i, weight in enumerate(weights):
+        bound = min(demand[i], capacity // weight)
+        size = 1
+        while bound:
+            take = min(size, bound)
+            chunks.append((i, take, reachable))
+            reachable = (reachable | (reachable << (weight * take))) & mask
+            bound -= take
+            size *= 2
+    used = reachable.bit_length() - 1
+    pattern = {}
+    total = used
+    for i, take, before in reversed(chunks):
+        if not before >> total & 1:
+            pattern[i] = pattern.get(i, 0) + take
+            total -= weights[i] * take
+    return pattern, used
@@ -0,0 +1,178 @@
+"""
+Multi-start search over piece orderings.
+
+The packing engines are greedy: they place pieces in one fixed order, area
+descending. Other orders (longest side, width, perimeter) and random
+perturbations of them often save a board. This module packs the same cut
+list in many orders across a process pool and keeps the best plan.
+
+Workers only send back the board count and pattern count of each ordering,
+never the plan itself, so the pool scales with the number of cores instead
+of with pickling. The winning ordering is repacked once in the calling process.
+"""
+
+import multiprocessing
+import os
+import random
+import time
+
+import instrument
+import packing
+
+# Sort keys for the base orderings; every one packs the largest first
+ORDERINGS = {
+    "area": lambda p: p["length"] * p["width"],
+    "longest_side": lambda p: max(p["length"], p["width"]),
+    "width": lambda p: min(p["length"], p["width"]),
+    "perimeter": lambda p: p["length"] + p["width"],
+}
+
+# How far a perturbed sort key may stray from the base key, as a fraction
+PERTURBATION = 0.15
+
+_job = None  # (stock_length, stock_width, groups, kerf, rule, engine) in a worker
+
+
+def ordering_specs(starts, seed=0):
+    """
+    Returns the (ordering, perturbation_seed) pairs to try, in order.
+
+    The plain base orderings come first; the rest cycle through the base
+    orderings with a perturbation seed derived from seed, so the same seed
+    always gives the same candidates.
+    """
+    names = list(ORDERINGS)
+    rng = random.Random(seed)
+    specs = []
+    for i in range(starts):
+        name = names[i % len(names)]
+        specs.append((name, None if i < len(names) else rng.getrandbits(32)))
+    return specs
+
+
+def order_groups(groups, name, perturbation_seed=None):
+    """Returns the (piece, count) groups sorted by the named ordering, optionally perturbed."""
+    key = ORDERINGS[name]
+    if perturbation_seed is None:
+        return sorted(groups, key=lambda g: key(g[0]), reverse=True)
+    rng = random.Random(perturbation_seed)
+    noisy = [(key(piece) * rng.uniform(1 - PERTURBATION, 1 + PERTURBATION), i) for i, (piece, _) in enumerate(groups)]
+    noisy.sort(reverse=True)
+    return [groups[i] for _, i in noisy]
+
+
+def search(stock_length, stock_width, cut_pieces, kerf=packing.BLADE_KERF, rule=packing.FIRST_FIT,
+           engine=packing.SHELF, starts=32, time_budget=None, seed=0, workers=None, progress=None, cancel=None):
+    """
+    Packs the cut list in up to `starts` orderings and returns the best CutPlan.
+
+    The best plan has the fewest boards, then the fewest patterns; ties go to the
+    earlier ordering, so a given seed always picks the same plan when every
+    ordering finishes. time_budget (seconds) caps the wall-clock time; when
+    it runs out the best plan among the finished orderings is returned. The
+    plain area ordering always runs first, in this process, so there is
+    always a plan. workers defaults to the number of CPUs; 1 runs everything
+    in this process. The search stops early once a plan uses exactly the
+    cut list's lower bound of boards (see bounds.py), since no ordering can
+    beat it. Only an exact match counts: a plan below the bound would mean
+    the bound is wrong, and then the search keeps going.
+
+    progress, if given, is called as progress(orderings_done, starts,
+    best_board_count) as orderings finish. Setting cancel (a threading.Event)
+    stops the search and returns the best plan found so far; only a cancel
+    during the first ordering raises packing.Cancelled.
+
+    The plan's stats are those of its own packing, plus the "search" phase
+    and the number of orderings tried.
+    """
+    start = time.perf_counter()
+    packing.validate_stock(stock_length, stock_width, cut_pieces)
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    groups = packing.piece_groups(cut_pieces)
+    specs = ordering_specs(max(starts, 1), seed)
+
+    best_plan = packing.pack_groups(stock_length, stock_width, order_groups(groups, *specs[0]), kerf, rule, engine,
+                                    cancel=cancel)
+    best_plan.ordering = specs[0]
+    best = (best_plan.board_count, best_plan.pattern_count, 0)
+    if progress is not None:
+        progress(1, len(specs), best[0])
+
+    job = (stock_length, stock_width, groups, kerf, rule, engine)
+    workers = workers or os.cpu_count() or 1
+    done = 1
+    if best[0] != best_plan.lower_bound:
+        scores = _scores(job, specs, workers, deadline)
+        for done, score in enumerate(scores, start=2):
+            if score < best:
+                best = score
+            if progress is not None:
+                progress(done, len(specs), best[0])
+            if best[0] == best_plan.lower_bound or (cancel is not None and cancel.is_set()):
+                break
+        scores.close()
+
+    if best[2] != 0:
+        index = best[2]
+        best_plan = packing.pack_groups(stock_length, stock_width, order_groups(groups, *specs[index]), kerf, rule, engine)
+        best_plan.ordering = specs[index]
+    instrument.count(best_plan.stats, "orderings_tried", done)
+    best_plan.stats["phases"]["search"] = time.perf_counter() - start
+    return best_plan
+
+
+def _scores(job, specs, workers, deadline):
+    """Yields (board_count, pattern_count, spec_index) for specs[1:] as they finish."""
+    pending_specs = list(enumerate(specs))[1:]
+    if not pending_specs:
+        return
+    if workers == 1:
+        _init_worker(job)
+        for index, spec in pending_specs:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            yield _score(index, spec)
+        return
+
+    # Imported here so that importing the optimizer stays fast; see check_import_time.py
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    # Spawned, not forked: the GUI runs searches from a worker thread of a process
+    # holding a Tk interpreter, and the job reaches the workers through initargs anyway
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(job,))
+    # Keep a couple of orderings queued per worker so none sits idle,
+    # without queueing work that the deadline would only throw away.
+    queue = iter(pending_specs)
+    running = set()
+    try:
+        while True:
+            while len(running) < workers * 2:
+                spec = next(queue, None)
+                if spec is None:
+                    break
+                running.add(pool.submit(_score, *spec))
+            if not running:
+                return
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            if not done:
+                return
+    finally:
+        # Do not wait for orderings still running past the deadline
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_worker(job):
+    """Stores the job in a worker once, so each ordering only ships its spec."""
+    global _job
+    _job = job
+
+
+def _score(index, spec):
+    """Packs the stored job in one ordering and returns its score."""
+    stock_length, stock_width, groups, kerf, rule, engine = _job
+    plan = packing.pack_groups(stock_length, stock_width, order_groups(groups, *spec), kerf, rule, engine)
+    return plan.board_count, plan.pattern_count, index
@@ -0,0 +1,668 @@
+"""
+Headless packing engine for the Wood Cutting Optimizer.
+
+This module has no GUI dependencies, so it can be imported and run on a
+server without a display. The Tk applications call into it and only take
+care of reading their entry widgets and drawing the returned plan.
+"""
+
+import bounds
+import fixed_point
+import guillotine
+import instrument
+import linear
+from layout import Board, Placements, Shelf, cut_copies
+from shelf_index import ShelfIndex
+
+BLADE_KERF = 0.125  # Blade thickness in inches
+
+# Packing engines
+SHELF = "shelf"
+GUILLOTINE = "guillotine"
+MAXRECTS = "maxrects"
+LINEAR = "linear"
+ENGINES = (SHELF, GUILLOTINE, MAXRECTS, LINEAR)
+
+# Shelf selection rules
+FIRST_FIT = "first_fit"
+BEST_FIT = "best_fit"
+
+
+class Cancelled(Exception):
+    """Raised when a caller's cancel event is set while a plan is being packed."""
+
+
+class CutPlan:
+    """
+    The result of packing a cut list onto stock boards.
+
+    Boards are layout.Board records: each board has used_height, waste and a
+    list of shelves, and each shelf has height, remaining_length and a list
+    of pieces. Boards from the free-rectangle engines have no shelves and
+    list their pieces as (x, y, piece) placements instead; use
+    board_pieces() to walk either kind. The records also take the dict-style
+    lookups (board["shelves"]) the drawing code uses.
+
+    Boards with the same layout are grouped into cutting patterns (see
+    find_patterns()); the waste is worked out once per pattern, and the
+    GUIs, reports and to_dict() show each pattern once with its count.
+
+    stats holds the time spent in each phase and the engine counters (see
+    instrument.py); pass the dict the packing phases were recorded in.
+    """
+
+    def __init__(self, stock_length, stock_width, kerf, boards, stats=None):
+        self.stock_length = stock_length
+        self.stock_width = stock_width
+        self.kerf = kerf
+        self.boards = boards
+        self.stats = instrument.new_stats() if stats is None else stats
+        with instrument.phase(self.stats, "patterns"):
+            self.patterns = find_patterns(boards)
+        with instrument.phase(self.stats, "waste"):
+            self.total_waste = pattern_waste(stock_length, stock_width, boards, self.patterns)
+        self.stats["counters"]["boards"] = len(boards)
+        self.stats["counters"]["patterns"] = len(self.patterns)
+        self.ordering = None  # (ordering, perturbation_seed) when found by multistart.search()
+        self.proven_optimal = False  # set by exact.solve() when no plan uses fewer boards
+        self.linear_waste = None  # stock length left over, in inches, for plans from the LINEAR engine
+        self.lower_bound = None  # fewest boards any plan could use (see bounds.py), set by pack_groups()
+
+    @property
+    def board_count(self):
+        """Number of stock boards used by the plan."""
+        return len(self.boards)
+
+    @property
+    def pattern_count(self):
+        """Number of distinct board layouts in the plan."""
+        return len(self.patterns)
+
+    def summary(self):
+        """Returns the one-line summary shown in the results label and reports."""
+        text = (f"Optimization Results: {self.board_count} Boards Used ({self.pattern_count} Patterns), "
+                f"Total Waste: {self.total_waste:.2f} sq. in.")
+        if self.linear_waste is not None:
+            text += f", Linear Waste: {self.linear_waste:.2f} in."
+        if self.lower_bound is not None:
+            text += f", {bound_text(self)}"
+        return text
+
+    def to_dict(self):
+        """Returns the plan as plain JSON-serializable data, one entry per cutting pattern."""
+        patterns = []
+        for pattern in self.patterns:
+            board = pattern["board"]
+            entry = {"count": pattern["count"], "used_height": board.used_height, "waste": board.waste}
+            if "placements" in board:
+                entry["placements"] = [[x, y, piece["length"], piece["width"]] for x, y, piece in board.placements]
+            else:
+                entry["shelves"] = [
+                    {"height": shelf.height, "remaining_length": shelf.remaining_length,
+                     "pieces": [[piece["length"], piece["width"]] for piece in shelf.pieces]}
+                    for shelf in board.shelves
+                ]
+            patterns.append(entry)
+        return {
+            "stock_length": self.stock_length,
+            "stock_width": self.stock_width,
+            "kerf": self.kerf,
+            "board_count": self.board_count,
+            "total_waste": self.total_waste,
+            "linear_waste": self.linear_waste,
+            "lower_bound": self.lower_bound,
+            "patterns": patterns,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a plan saved with to_dict(), or with its older one-entry-per-board
+        "boards" form. Pieces of the same size share one dict.
+        """
+        pieces = {}
+
+        def piece(length, width):
+            key = (length, width)
+            if key not in pieces:
+                pieces[key] = {"length": length, "width": width}
+            return pieces[key]
+
+        boards = []
+        for entry in data.get("patterns", data.get("boards", [])):
+            if "placements" in entry:
+                board = Board(entry["used_height"], [],
+                              Placements((x, y, piece(length, width)) for x, y, length, width in entry["placements"]))
+            else:
+                board = Board(entry["used_height"], [
+                    Shelf(shelf["height"], shelf["remaining_length"],
+                          [piece(length, width) for length, width in shelf["pieces"]])
+                    for shelf in entry["shelves"]
+                ])
+            boards.append(board)
+            for _ in range(entry.get("count", 1) - 1):
+                boards.append(board.copy())
+        plan = cls(data["stock_length"], data["stock_width"], data["kerf"], boards)
+        plan.linear_waste = data.get("linear_waste")
+        plan.lower_bound = data.get("lower_bound")
+        return plan
+
+
+def bound_text(plan):
+    """
+    The lower bound and the plan's gap to it, as shown in the results. A
+    bound above the plan is wrong: it is logged (see instrument.log()) and
+    shown as unavailable rather than as a negative gap.
+    """
+    try:
+        over, fraction = bounds.gap(plan)
+    except ValueError as e:
+        instrument.log({"event": "invalid_lower_bound", "error": str(e), **plan.stats})
+        return "Lower Bound: unavailable"
+    text = f"Lower Bound: {boards_text(plan.lower_bound)}"
+    if over == 0:
+        return text + " (optimal)"
+    text += f" (Gap: {boards_text(over)}, {fraction:.0%}"
+    if plan.proven_optimal:
+        text += "; plan proven optimal by search"
+    return text + ")"
+
+
+def boards_text(count):
+    """A number of boards, as "1 Board" or "3 Boards"."""
+    return f"{count} Board{'s' if count != 1 else ''}"
+
+
+def validate_stock(stock_length, stock_width, cut_pieces):
+    """Raises ValueError if the stock dimensions or the cut list are unusable."""
+    if stock_length <= 0 or stock_width <= 0 or not cut_pieces:
+        raise ValueError("Please enter stock board dimensions and add pieces.")
+
+
+def compute_waste(stock_length, stock_width, boards):
+    """
+    Stores the waste on every board and returns the total waste in sq. in.
+    Waste is the board area not covered by pieces, kerf included, the same
+    for every engine.
+    """
+    board_area = stock_length * stock_width
+    total_waste = 0
+    for board in boards:
+        used_area = sum(piece["length"] * piece["width"] for _, _, piece in board.get("placements", ()))
+        for shelf in board.shelves:
+            used_area += sum(piece["length"] * piece["width"] for piece in shelf.pieces)
+        board.waste = board_area - used_area
+        total_waste += board.waste
+    return total_waste
+
+
+def find_patterns(boards):
+    """
+    Groups boards with the same layout into cutting patterns.
+
+    Returns a list of {"board", "count", "boards"} dicts in order of first
+    use, where "board" is the first board with the layout and "boards" the
+    indexes of every board that has it.
+    """
+    patterns = []
+    by_layout = {}
+    for i, board in enumerate(boards):
+        if "placements" in board:
+            layout = tuple((x, y, piece["length"], piece["width"]) for x, y, piece in board.placements)
+        else:
+            layout = tuple((shelf.height, tuple((piece["length"], piece["width"]) for piece in shelf.pieces))
+                           for shelf in board.shelves)
+        pattern = by_layout.get(layout)
+        if pattern is None:
+            pattern = by_layout[layout] = {"board": board, "count": 0, "boards": []}
+            patterns.append(pattern)
+        pattern["count"] += 1
+        pattern["boards"].append(i)
+    return patterns
+
+
+def pattern_waste(stock_length, stock_width, boards, patterns):
+    """Like compute_waste(), but works the waste out once per pattern."""
+    compute_waste(stock_length, stock_width, [pattern["board"] for pattern in patterns])
+    total_waste = 0
+    for pattern in patterns:
+        waste = pattern["board"].waste
+        for i in pattern["boards"]:
+            boards[i].waste = waste
+        total_waste += waste * pattern["count"]
+    return total_waste
+
+
+def pattern_label(index):
+    """Returns the letter name of the pattern at index: A to Z, then AA, AB and so on."""
+    label = ""
+    index += 1
+    while index:
+        index, letter = divmod(index - 1, 26)
+        label = chr(ord("A") + letter) + label
+    return label
+
+
+def board_pieces(board, kerf):
+    """Yields (x, y, piece) for every piece on a board, measured from its corner."""
+    if "placements" in board:
+        yield from board.placements
+        return
+    y = 0
+    for shelf in board.shelves:
+        x = 0
+        for piece in shelf.pieces:
+            yield x, y, piece
+            x += piece["length"] + kerf
+        y += shelf.height + kerf
+
+
+def fits_new_board(stock_length, stock_width, kerf, oriented):
+    """True if an (already oriented) piece can start an empty board, with one kerf each way."""
+    return oriented["width"] + kerf <= stock_width and oriented["length"] + kerf <= stock_length
+
+
+def fits_new_shelf(stock_length, stock_width, kerf, used_height, oriented):
+    """
+    True if an (already oriented) piece can start a new shelf above used_height.
+    The shelf takes one kerf across the board, but the piece may run flush
+    with the board's end, since kerf only falls between cuts.
+    """
+    return used_height + oriented["width"] + kerf <= stock_width and oriented["length"] <= stock_length
+
+
+def check_piece_fits(stock_length, stock_width, kerf, piece):
+    """Raises ValueError if a piece fits an empty board in neither orientation."""
+    rotated = {"length": piece["width"], "width": piece["length"]}
+    if (fits_new_board(stock_length, stock_width, kerf, piece)
+            or fits_new_board(stock_length, stock_width, kerf, rotated)):
+        return
+    raise ValueError(
+        f"Cannot cut piece {piece['length']}\" x {piece['width']}\" as it is too large "
+        f"for the stock board ({stock_length}\" x {stock_width}\")."
+    )
+
+
+def optimize(stock_length, stock_width, cut_pieces, kerf=BLADE_KERF, rule=FIRST_FIT, engine=SHELF,
+             progress=None, cancel=None, resolution=None):
+    """
+    Packs a cut list onto stock boards and returns a CutPlan.
+
+    cut_pieces is a list of {"length", "width", "quantity"} dicts, the same
+    format the GUI builds and the JSON cut-list files store. Uses a simplified
+    shelf-packing algorithm with rotation logic.
+
+    engine picks the algorithm: SHELF, the free-rectangle engines
+    GUILLOTINE (saw-friendly cuts) and MAXRECTS (see guillotine.py), or
+    LINEAR for crosscutting pieces as wide as the stock (see linear.py).
+    For the shelf engine, rule picks the shelf a piece goes on: FIRST_FIT (the
+    first shelf, in board order, that takes it) or BEST_FIT (the shelf it fits
+    most tightly).
+
+    progress, if given, is called as progress(pieces_placed, total_pieces,
+    boards_so_far) after each piece type. If cancel (a threading.Event) is
+    set, packing stops with Cancelled at the next piece type.
+
+    resolution, in units per inch (e.g. fixed_point.DEFAULT_RESOLUTION), packs
+    in exact integer units and converts the plan back to inches (see
+    fixed_point.py). Raises ValueError if a dimension is not a whole number
+    of units.
+    """
+    validate_stock(stock_length, stock_width, cut_pieces)
+    if resolution is not None:
+        plan = optimize(fixed_point.to_units(stock_length, resolution), fixed_point.to_units(stock_width, resolution),
+                        fixed_point.cut_list_to_units(cut_pieces, resolution), fixed_point.to_units(kerf, resolution),
+                        rule, engine, progress, cancel)
+        with instrument.phase(plan.stats, "to_inches"):
+            return fixed_point.plan_to_inches(plan, resolution)
+    stats = instrument.new_stats()
+    with instrument.phase(stats, "grouping"):
+        groups = piece_groups(cut_pieces)
+    return pack_groups(stock_length, stock_width, groups, kerf, rule, engine, progress, cancel, stats)
+
+
+def pack_groups(stock_length, stock_width, groups, kerf=BLADE_KERF, rule=FIRST_FIT, engine=SHELF,
+                progress=None, cancel=None, stats=None):
+    """
+    Packs (piece, count) groups in the order given and returns a CutPlan.
+    Phases and counters are added to stats, if given, and end up in plan.stats.
+    """
+    if stats is None:
+        stats = instrument.new_stats()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown packing engine: {engine}")
+    if rule not in (FIRST_FIT, BEST_FIT):
+        raise ValueError(f"Unknown shelf rule: {rule}")
+    if engine != LINEAR:
+        for piece, _ in groups:
+            check_piece_fits(stock_length, stock_width, kerf, piece)
+
+    instrument.count(stats, "piece_types", len(groups))
+    instrument.count(stats, "pieces", sum(count for _, count in groups))
+    on_group = _group_hook(groups, progress, cancel)
+    with instrument.phase(stats, "packing"):
+        if engine == LINEAR:
+            boards = linear.pack(stock_length, stock_width, groups, kerf, on_group=on_group, stats=stats)
+        elif engine != SHELF:
+            boards = _pack_free_rects(stock_length, stock_width, groups, kerf, engine, on_group, stats)
+        else:
+            boards, _ = _pack_shelves(stock_length, stock_width, groups, kerf, rule, on_group=on_group, stats=stats)
+    plan = CutPlan(stock_length, stock_width, kerf, boards, stats)
+    if engine == LINEAR:
+        plan.linear_waste = linear.linear_waste(stock_length, plan.patterns)
+    _set_lower_bound(plan, groups, engine)
+    return plan
+
+
+def _set_lower_bound(plan, groups, engine=SHELF):
+    """Stores the lower bound for all of a plan's (piece, count) groups on it."""
+    with instrument.phase(plan.stats, "bounds"):
+        plan.lower_bound = bounds.lower_bound(plan.stock_length, plan.stock_width, groups, plan.kerf,
+                                              one_dimensional=(engine == LINEAR))
+
+
+def _pack_free_rects(stock_length, stock_width, groups, kerf, engine, on_group, stats):
+    """
+    Runs a free-rectangle engine (see guillotine.py) with the shelf engine as
+    a floor. A shelf layout can be cut on a panel saw too, so when it needs
+    fewer boards its shelves are returned as placements instead.
+    """
+    boards = guillotine.pack(stock_length, stock_width, groups, kerf, maxrects=(engine == MAXRECTS),
+                             on_group=on_group, stats=stats)
+    shelf_boards, _ = _pack_shelves(stock_length, stock_width, groups, kerf, FIRST_FIT,
+                                    stats=instrument.new_stats())
+    if len(shelf_boards) >= len(boards):
+        return boards
+    instrument.count(stats, "shelf_layouts_used")
+    return [Board(board.used_height, [], Placements(board_pieces(board, kerf))) for board in shelf_boards]
+
+
+def _group_hook(groups, progress, cancel):
+    """
+    Returns the on_group(count, board_count) callback the engines call after
+    each piece type, or None when nobody is listening.
+    """
+    if progress is None and cancel is None:
+        return None
+    total = sum(count for _, count in groups)
+    placed = 0
+
+    def on_group(count, board_count):
+        nonlocal placed
+        placed += count
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        if progress is not None:
+            progress(placed, total, board_count)
+
+    return on_group
+
+
+def _pack_shelves(stock_length, stock_width, groups, kerf, rule, boards=None, index=None, on_group=None,
+                  stats=None):
+    """Runs the shelf engine, optionally continuing an earlier run. Returns (boards, index)."""
+    if boards is None:
+        boards = []
+        index = ShelfIndex(stock_length, stock_width, kerf, best_fit=(rule == BEST_FIT))
+    if stats is None:
+        stats = instrument.new_stats()
+    for piece, count in groups:
+        _place_group(boards, index, stock_length, stock_width, kerf, piece, count, rule, stats)
+        if on_group is not None:
+            on_group(count, len(boards))
+    return boards, index
+
+
+def piece_groups(cut_pieces):
+    """
+    Returns the cut list as (piece, count) pairs in packing order.
+
+    Lines are sorted by area in descending order (stable, so ties keep their
+    input order) and adjacent lines with the same dimensions are merged. This
+    is the same order the pieces would have if every quantity were expanded
+    into single pieces and sorted, without building those pieces.
+    """
+    lines = sorted(cut_pieces, key=lambda p: p["length"] * p["width"], reverse=True)
+    groups = []
+    for item in lines:
+        if item["quantity"] <= 0:
+            continue
+        if groups and groups[-1][0]["length"] == item["length"] and groups[-1][0]["width"] == item["width"]:
+            groups[-1][1] += item["quantity"]
+        else:
+            groups.append([{"length": item["length"], "width": item["width"]}, item["quantity"]])
+    return [(piece, count) for piece, count in groups]
+
+
+class IncrementalPacker:
+    """
+    Keeps a shelf plan between runs, so lines appended to the cut list are
+    packed into the existing boards instead of repacking the whole list.
+
+    Pieces added later miss out on the area-descending order, so the plan
+    slowly drifts from what a full repack would give. The packer repacks from
+    scratch when the share of stock area wasted (everything not covered by a
+    piece) grows more than max_waste_growth past the last full repack, or
+    once the piece area has grown by more than max_area_growth since then,
+    which keeps the number of full repacks logarithmic in the list size. It
+    also repacks whenever a line is edited or removed or the stock, kerf or
+    rule changes.
+
+    Appended lines are packed into copies of the kept boards, which replace
+    them only once the pass succeeds, so a returned plan never changes, even
+    when a later run is cancelled.
+    """
+
+    def __init__(self, max_waste_growth=0.02, max_area_growth=0.5):
+        self.max_waste_growth = max_waste_growth
+        self.max_area_growth = max_area_growth
+        self.reset()
+
+    def reset(self):
+        """Forgets the kept plan, so the next call repacks from scratch."""
+        self._settings = None
+        self._lines = []
+        self._boards = None
+        self._index = None
+        self._plan = None
+        self._baseline_waste = None
+        self._baseline_area = None
+
+    def optimize(self, stock_length, stock_width, cut_pieces, kerf=BLADE_KERF, rule=FIRST_FIT,
+                 progress=None, cancel=None):
+        """
+        Returns a CutPlan for the cut list, packing only the appended lines when
+        possible. progress and cancel work as in optimize(); a cancelled run
+        forgets the kept plan.
+        """
+        try:
+            return self._optimize(stock_length, stock_width, cut_pieces, kerf, rule, progress, cancel)
+        except Cancelled:
+            self.reset()
+            raise
+
+    def _optimize(self, stock_length, stock_width, cut_pieces, kerf, rule, progress, cancel):
+        validate_stock(stock_length, stock_width, cut_pieces)
+        settings = (stock_length, stock_width, kerf, rule)
+        lines = [(item["length"], item["width"], item["quantity"]) for item in cut_pieces]
+        piece_area = sum(length * width * quantity for length, width, quantity in lines)
+        if (settings == self._settings and self._plan is not None
+                and lines[:len(self._lines)] == self._lines
+                and piece_area <= self._baseline_area * (1 + self.max_area_growth)):
+            if len(lines) == len(self._lines):
+                return self._plan
+            stats = instrument.new_stats()
+            with instrument.phase(stats, "grouping"):
+                groups = piece_groups(cut_pieces[len(self._lines):])
+            for piece, _ in groups:
+                check_piece_fits(stock_length, stock_width, kerf, piece)
+            instrument.count(stats, "pieces", sum(count for _, count in groups))
+            instrument.count(stats, "incremental_packs")
+            with instrument.phase(stats, "packing"):
+                boards, index = self._copy_boards(stock_length, stock_width, kerf, rule)
+                _pack_shelves(stock_length, stock_width, groups, kerf, rule, boards, index,
+                              _group_hook(groups, progress, cancel), stats)
+            self._boards, self._index = boards, index
+            self._lines = lines
+            plan = CutPlan(stock_length, stock_width, kerf, boards, stats)
+            _set_lower_bound(plan, piece_groups(cut_pieces))
+            if _waste_fraction(plan, piece_area) <= self._baseline_waste + self.max_waste_growth:
+                self._plan = plan
+                return plan
+
+        # Full repack
+        stats = instrument.new_stats()
+        with instrument.phase(stats, "grouping"):
+            groups = piece_groups(cut_pieces)
+        for piece, _ in groups:
+            check_piece_fits(stock_length, stock_width, kerf, piece)
+        self.reset()
+        instrument.count(stats, "pieces", sum(count for _, count in groups))
+        instrument.count(stats, "full_repacks")
+        with instrument.phase(stats, "packing"):
+            self._boards, self._index = _pack_shelves(stock_length, stock_width, groups, kerf, rule,
+                                                      on_group=_group_hook(groups, progress, cancel), stats=stats)
+        self._settings = settings
+        self._lines = lines
+        self._plan = CutPlan(stock_length, stock_width, kerf, self._boards, stats)
+        _set_lower_bound(self._plan, groups)
+        self._baseline_waste = _waste_fraction(self._plan, piece_area)
+        self._baseline_area = piece_area
+        return self._plan
+
+    def _copy_boards(self, stock_length, stock_width, kerf, rule):
+        """Returns copies of the kept boards and a shelf index over the copies."""
+        boards = [board.copy() for board in self._boards]
+        index = ShelfIndex(stock_length, stock_width, kerf, best_fit=(rule == BEST_FIT))
+        for board in boards:
+            index.add_board(board)
+        return boards, index
+
+
+def _waste_fraction(plan, piece_area):
+    """Share of the plan's stock area not covered by pieces."""
+    return 1 - piece_area / (plan.board_count * plan.stock_length * plan.stock_width)
+
+
+def _place_group(boards, index, stock_length, stock_width, kerf, piece, count, rule, stats):
+    """
+    Places count copies of one piece type using the given shelf rule.
+
+    Gives the same layout as placing the copies one at a time, but fills a
+    whole shelf row per step and repeats a fully packed board in one go.
+    With first fit, only the board a copy lands on changes, so the boards
+    before it stay unable to take another copy and the scan never has to go
+    back. The shelf index jumps straight to the next board that may fit.
+    Counts the boards and shelves it probes and the boards it opens in stats.
+    """
+    rotated = {"length": piece["width"], "width": piece["length"]}
+    board_index = 0
+    while count:
+        if rule == BEST_FIT:
+            found = index.best_shelf(piece)
+            if found is not None:
+                board_index, shelf = found
+                count -= _fill_shelf(shelf, kerf, piece, rotated, count)
+                index.update_board(board_index)
+                continue
+            board_index = 0
+
+        board_index = index.next_board(board_index, piece)
+        while board_index < len(boards):
+            instrument.count(stats, "boards_probed")
+            placed = _fill_board(boards[board_index], stock_length, stock_width, kerf, piece, rotated, count, stats)
+            if placed:
+                index.update_board(board_index)
+                count -= placed
+                if not count or rule == BEST_FIT:
+                    break
+            else:
+                board_index = index.next_board(board_index + 1, piece)
+        if not count or board_index < len(boards):
+            continue
+
+        # If not placed on any existing board, create a new board
+        board = _new_board(stock_length, stock_width, kerf, piece, rotated)
+        boards.append(board)
+        instrument.count(stats, "boards_opened")
+        placed_on_board = 1
+        count -= 1
+        placed = _fill_board(board, stock_length, stock_width, kerf, piece, rotated, count)
+        while placed:
+            placed_on_board += placed
+            count -= placed
+            placed = _fill_board(board, stock_length, stock_width, kerf, piece, rotated, count)
+        index.add_board(board)
+
+        # Every further full board of this piece would be packed the same way
+        repeats = count // placed_on_board
+        for _ in range(repeats):
+            boards.append(board.copy())
+            index.add_board(boards[-1])
+        instrument.count(stats, "boards_copied", repeats)
+        count -= repeats * placed_on_board
+        board_index = len(boards)
+
+
+def _fill_board(board, stock_length, stock_width, kerf, piece, rotated, count, stats=None):
+    """
+    Places up to count copies of a piece on the first shelf of the board that
+    takes one, opening a new shelf if none does. Returns how many were placed.
+    The shelves it tries are counted in stats, if given.
+    """
+    if not count:
+        return 0
+    # Try to place the piece on an existing shelf
+    for probed, shelf in enumerate(board.shelves, start=1):
+        placed = _fill_shelf(shelf, kerf, piece, rotated, count)
+        if placed:
+            if stats is not None:
+                instrument.count(stats, "shelves_probed", probed)
+            return placed
+    if stats is not None:
+        instrument.count(stats, "shelves_probed", len(board.shelves))
+
+    # If not placed on an existing shelf, try to create a new shelf on the current board
+    if fits_new_shelf(stock_length, stock_width, kerf, board.used_height, piece):
+        oriented = piece
+    # Check if the piece fits when rotated
+    elif fits_new_shelf(stock_length, stock_width, kerf, board.used_height, rotated):
+        oriented = rotated
+    else:
+        return 0
+    shelf = _new_shelf(stock_length, kerf, oriented)
+    board.shelves.append(shelf)
+    board.used_height += oriented["width"] + kerf
+    return 1 + _fill_shelf(shelf, kerf, piece, rotated, count - 1)
+
+
+def _fill_shelf(shelf, kerf, piece, rotated, count):
+    """
+    Places as many of count copies of a piece as fit on a shelf, upright
+    first and then rotated. Returns how many were placed.
+    """
+    placed = 0
+    for oriented in (piece, rotated):
+        if placed == count or oriented["width"] > shelf.height:
+            continue
+        step = oriented["length"] + kerf
+        copies, remaining_length = cut_copies(shelf.remaining_length, step, count - placed)
+        if copies:
+            shelf.pieces.extend([oriented] * copies)
+            shelf.remaining_length = remaining_length
+            placed += copies
+    return placed
+
+
+def _new_shelf(stock_length, kerf, piece):
+    """Starts a shelf whose height is set by its first (already oriented) piece."""
+    return Shelf(piece["width"], stock_length - (piece["length"] + kerf), [piece])
+
+
+def _new_board(stock_length, stock_width, kerf, piece, rotated):
+    """Opens a new board for a piece, rotating it if that is the only way it fits."""
+    if fits_new_board(stock_length, stock_width, kerf, piece):
+        oriented = piece
+    else:
+        oriented = rotated
+    return Board(oriented["width"] + kerf, [_new_shelf(stock_length, kerf, oriented)])
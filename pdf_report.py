@@ -0,0 +1,221 @@
+"""
+PDF report of a cutting plan, written with ReportLab.
+
+The report lists the stock and the cut list, the results line, and one
+diagram per cutting pattern. Each page is handed to ReportLab with
+showPage() as soon as it is full. Every distinct piece size is drawn once
+as a form (a PDF XObject) that the diagrams place wherever the piece
+occurs, so the file grows with the number of distinct sizes and layouts,
+not with the number of pieces.
+
+Long reports are split into runs of pages that worker processes render
+into separate files, which are then joined in page order. Joining needs
+pypdf; without it the report is rendered in this process.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas as pdf_canvas
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+import packing
+
+PADDING = 0.5 * inch
+BOARD_SPACING = 0.25 * inch
+
+# Reports shorter than this are rendered in this process; starting workers costs more
+PARALLEL_MIN_PAGES = 16
+
+
+def write_report(file_path, stock_length, stock_width, patterns, cut_pieces, results_text, kerf=packing.BLADE_KERF,
+                 workers=None):
+    """
+    Writes the report for a plan's patterns to file_path.
+
+    workers defaults to the number of CPUs; 1 renders every page in this
+    process. Returns {"pages", "seconds", "pages_per_second"} so callers can
+    show or log the export speed.
+    """
+    start = time.perf_counter()
+    pages = paginate(stock_length, stock_width, len(patterns), _diagram_top(cut_pieces))
+    job = (stock_length, stock_width, cut_pieces, results_text, kerf)
+    workers = min(workers or os.cpu_count() or 1, len(pages))
+    if workers > 1 and PdfWriter is not None and len(pages) >= PARALLEL_MIN_PAGES:
+        _write_parallel(file_path, job, patterns, pages, workers)
+    else:
+        _render_pages(file_path, job, _page_contents(patterns, pages), 0)
+
+    seconds = time.perf_counter() - start
+    return {"pages": len(pages), "seconds": seconds,
+            "pages_per_second": len(pages) / seconds if seconds > 0 else None}
+
+
+def paginate(stock_length, stock_width, pattern_count, start_y):
+    """
+    Lays the pattern diagrams out on pages, the first one starting at start_y.
+
+    Returns one list per page of (pattern_index, y) pairs, where y is the
+    bottom of the diagram.
+    """
+    _, page_height = letter
+    board_height_scaled = stock_width * _scale(stock_length)
+    pages = [[]]
+    current_y = start_y
+    for i in range(pattern_count):
+        # Check if a new page is needed
+        if current_y - board_height_scaled - BOARD_SPACING < PADDING:
+            pages.append([])
+            current_y = page_height - PADDING
+        y = current_y - board_height_scaled
+        pages[-1].append((i, y))
+        current_y = y - BOARD_SPACING
+    return pages
+
+
+def _scale(stock_length):
+    """Points per inch of stock; the same in both directions to keep the aspect ratio."""
+    page_width, _ = letter
+    return (page_width - 2 * PADDING) / stock_length
+
+
+def _diagram_top(cut_pieces):
+    """Where the first diagram starts, below the title, the cut list and the results line."""
+    return letter[1] - inch * 0.5 - inch * 0.5 - 0.25 * inch * (2 + len(cut_pieces)) - 0.25 * inch - 0.5 * inch
+
+
+def _page_contents(patterns, pages):
+    """Swaps the pattern indexes in pages for (index, pattern, y), ready to ship to a renderer."""
+    return [[(i, patterns[i], y) for i, y in page] for page in pages]
+
+
+def _write_parallel(file_path, job, patterns, pages, workers):
+    """Renders runs of pages in worker processes and joins their files in page order."""
+    run_length = -(-len(pages) // workers)
+    with tempfile.TemporaryDirectory() as directory:
+        # Spawned, not forked: exports run on a worker thread of the Tk process,
+        # and every part gets its job and pages as arguments
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = []
+            for first in range(0, len(pages), run_length):
+                part_path = os.path.join(directory, f"part{first}.pdf")
+                contents = _page_contents(patterns, pages[first:first + run_length])
+                futures.append((part_path, pool.submit(_render_pages, part_path, job, contents, first)))
+            writer = PdfWriter()
+            for part_path, future in futures:
+                future.result()
+                writer.append(part_path)
+        with open(file_path, "wb") as f:
+            writer.write(f)
+
+
+def _render_pages(file_path, job, pages, first_page):
+    """
+    Renders pages, given as lists of (index, pattern, y), to their own PDF.
+    first_page is the number of the first one in the report; page 0 also
+    gets the title, the cut list and the results line.
+    """
+    stock_length, stock_width, cut_pieces, results_text, kerf = job
+    c = pdf_canvas.Canvas(file_path, pagesize=letter, pageCompression=1)
+    piece_forms = {}
+    for page_number, page in enumerate(pages, start=first_page):
+        if page_number == 0:
+            _draw_header(c, stock_length, stock_width, cut_pieces, results_text)
+        for i, pattern, y in page:
+            _draw_pattern(c, stock_length, stock_width, kerf, piece_forms, i, pattern, y)
+        c.showPage()
+    c.save()
+
+
+def _draw_header(c, stock_length, stock_width, cut_pieces, results_text):
+    """Draws the title, the input summary and the results line at the top of the first page."""
+    y = letter[1] - inch * 0.5  # Starting y position, with top margin
+
+    # Add title
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(inch * 0.5, y, "Wood Cutting Optimization Report")
+    y -= inch * 0.5
+
+    # Add input summary
+    c.setFont("Helvetica", 12)
+    c.drawString(inch * 0.5, y, f"Stock Board: {stock_length}\" x {stock_width}\"")
+    y -= 0.25 * inch
+    c.drawString(inch * 0.5, y, "Cut Pieces:")
+    y -= 0.25 * inch
+    for item in cut_pieces:
+        c.drawString(inch * 0.75, y, f"    - {item['quantity']} x {item['length']}\" x {item['width']}\"")
+        y -= 0.25 * inch
+    y -= 0.25 * inch
+
+    # Add optimization results
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(inch * 0.5, y, results_text)
+
+
+def _draw_pattern(c, stock_length, stock_width, kerf, piece_forms, i, pattern, y):
+    """Draws the diagram of the pattern at index i with its bottom edge at y."""
+    board = pattern["board"]
+    scale = _scale(stock_length)
+    board_width_scaled = stock_length * scale
+    board_height_scaled = stock_width * scale
+    x = PADDING
+
+    # Draw the full stock board rectangle
+    c.setFillColorRGB(0.76, 0.52, 0.23)  # Brown
+    c.rect(x, y, board_width_scaled, board_height_scaled, fill=1, stroke=1)
+
+    # Draw pieces on the board
+    for piece_x, piece_y, piece in packing.board_pieces(board, kerf):
+        c.saveState()
+        c.translate(x + piece_x * scale, y + piece_y * scale)
+        c.doForm(_piece_form(c, piece_forms, piece, scale))
+        c.restoreState()
+
+    # Draw waste area
+    used_height_scaled = board["used_height"] * scale
+    waste_height_scaled = board_height_scaled - used_height_scaled
+    if waste_height_scaled > 0:
+        c.setFillColorRGB(0.64, 0.69, 0.54)
+        c.rect(x, y + used_height_scaled, board_width_scaled, waste_height_scaled, fill=1, stroke=1)
+
+    # Label for the pattern and its waste
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(x, y + board_height_scaled + 5,
+                 f"Pattern {packing.pattern_label(i)} × {pattern['count']} - "
+                 f"Waste: {board['waste']:.2f} sq. in. per board")
+
+
+def _piece_form(c, piece_forms, piece, scale):
+    """Returns the name of the form drawing a piece of this size, defining it on first use."""
+    key = (piece["length"], piece["width"])
+    name = piece_forms.get(key)
+    if name is not None:
+        return name
+    name = piece_forms[key] = f"piece{len(piece_forms)}"
+
+    width = piece["length"] * scale
+    height = piece["width"] * scale
+    text = f"{piece['length']}\"x{piece['width']}\""
+    text_width = c.stringWidth(text, "Helvetica", 8)
+    # The label may stick out of a small piece; keep it inside the form's box
+    left = min(0, (width - text_width) / 2)
+    bottom = min(0, height / 2 - 5)
+    c.beginForm(name, lowerx=left, lowery=bottom, upperx=width - left, uppery=height - bottom)
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setFillColorRGB(0.55, 0.27, 0.07)  # Darker brown
+    c.rect(0, 0, width, height, fill=1, stroke=1)
+    c.setFillColorRGB(1, 1, 1)
+    c.setFont("Helvetica", 8)
+    c.drawString((width - text_width) / 2, height / 2 - 3, text)
+    c.endForm()
+    return name
@@ -0,0 +1,190 @@
+"""
+Two-tier result cache in front of the packing engines.
+
+Customers often re-submit the same order. The cache keys a plan by a hash of
+the canonical cut list (lines merged by size and sorted), the stock size,
+the kerf and the engine settings. Recent plans stay in an in-memory LRU, and
+every plan is also written to a cache directory that is trimmed to a size
+limit, oldest first.
+
+Plans returned from the memory tier are shared between callers and must not
+be modified.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import fixed_point
+import packing
+
+KEY_VERSION = 3  # bump when the engines or CutPlan.to_dict() change in a way that changes plans
+
+
+def canonical_cut_list(cut_pieces):
+    """Merges lines of the same size and sorts them, so line order does not matter."""
+    quantities = {}
+    for item in cut_pieces:
+        key = (float(item["length"]), float(item["width"]))
+        quantities[key] = quantities.get(key, 0) + int(item["quantity"])
+    return [{"length": length, "width": width, "quantity": quantity}
+            for (length, width), quantity in sorted(quantities.items()) if quantity > 0]
+
+
+def cache_key(stock_length, stock_width, cut_pieces, kerf, **settings):
+    """
+    Returns the hex digest identifying a packing job. With a resolution
+    setting the dimensions are hashed as whole fixed-point units, so inputs
+    that differ only by float noise share a key.
+    """
+    resolution = settings.get("resolution")
+    if resolution is not None:
+        stock_length = fixed_point.to_units(stock_length, resolution)
+        stock_width = fixed_point.to_units(stock_width, resolution)
+        kerf = fixed_point.to_units(kerf, resolution)
+        cut_pieces = fixed_point.cut_list_to_units(cut_pieces, resolution)
+    payload = {
+        "version": KEY_VERSION,
+        "stock": [float(stock_length), float(stock_width)],
+        "kerf": float(kerf),
+        "pieces": [[p["length"], p["width"], p["quantity"]] for p in canonical_cut_list(cut_pieces)],
+        "settings": settings,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    An in-memory LRU tier backed by an optional on-disk tier.
+
+    max_entries bounds the memory tier; max_bytes bounds the total size of
+    the files in directory. Counters are available from stats().
+    """
+
+    def __init__(self, directory=None, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                         "memory_evictions": 0, "disk_evictions": 0}
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def optimize(self, stock_length, stock_width, cut_pieces, kerf=packing.BLADE_KERF,
+                 rule=packing.FIRST_FIT, engine=packing.SHELF, resolution=None):
+        """packing.optimize() through the cache. Takes the same arguments."""
+        settings = {"rule": rule, "engine": engine}
+        if resolution is not None:
+            settings["resolution"] = resolution
+        key = cache_key(stock_length, stock_width, cut_pieces, kerf, **settings)
+        plan = self.get(key)
+        if plan is None:
+            plan = packing.optimize(stock_length, stock_width, canonical_cut_list(cut_pieces), kerf,
+                                    rule=rule, engine=engine, resolution=resolution)
+            self.put(key, plan)
+        return plan
+
+    def get(self, key):
+        """Returns the cached plan for key, or None."""
+        with self._lock:
+            plan = self.memory.get(key)
+            if plan is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return plan
+        plan = self._read_disk(key)
+        with self._lock:
+            if plan is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._remember(key, plan)
+        return plan
+
+    def put(self, key, plan):
+        """Stores a plan in both tiers."""
+        with self._lock:
+            self._remember(key, plan)
+        if self.directory:
+            self._write_disk(key, plan)
+
+    def stats(self):
+        """Returns a snapshot of the counters and tier sizes, for monitoring."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self.memory)
+            stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+    def _remember(self, key, plan):
+        self.memory[key] = plan
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            # Mark it recently used, since eviction goes by modification time
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return packing.CutPlan.from_dict(data)
+
+    def _write_disk(self, key, plan):
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(plan.to_dict(), f)
+            size = os.path.getsize(temp_path)
+            try:
+                old_size = os.path.getsize(path)  # overwriting a key frees its old file
+            except OSError:
+                old_size = 0
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += size - old_size
+            if self._disk_bytes > self.max_bytes:
+                self._evict_disk()
+
+    def _disk_files(self):
+        """Yields (mtime, size, path) for every cache file."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _evict_disk(self):
+        """Deletes the least recently used files until the tier fits max_bytes."""
+        files = sorted(self._disk_files())
+        # Rescan, since other processes may share the directory
+        self._disk_bytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._disk_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+            self.counters["disk_evictions"] += 1
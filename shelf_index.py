@@ -0,0 +1,186 @@
+"""
+Index over the open shelves of a shelf-packing plan.
+
+Finding where the next piece goes used to mean walking every shelf of every
+board. The index keeps, for each shelf height, the largest remaining length
+per board in a max segment tree, plus the free height left on every board,
+so the first board that can take a piece is found in logarithmic time. For
+the best-fit rule it also keeps the shelves of each height sorted by
+remaining length.
+
+The index only narrows the search. The caller still runs the exact fit
+checks on the board it gets back, so layouts never depend on the index.
+"""
+
+from bisect import bisect_left, insort
+
+# Slack for the free-height lookup, whose sum is computed in a different
+# order than the exact check. It can only let an extra board through.
+_EPS = 1e-9
+
+
+class MaxTree:
+    """
+    A growable max segment tree over board positions.
+
+    Answers "which is the first position at or after start holding a value of
+    at least x" in O(log n).
+    """
+
+    def __init__(self):
+        self.size = 1
+        self.tree = [float("-inf")] * 2
+
+    def set(self, pos, value):
+        """Stores value at pos, growing the tree if needed."""
+        while pos >= self.size:
+            self._grow()
+        tree = self.tree
+        i = pos + self.size
+        tree[i] = value
+        while i > 1:
+            i //= 2
+            left = tree[2 * i]
+            right = tree[2 * i + 1]
+            best = left if left >= right else right
+            if tree[i] == best:
+                break  # Nothing above changes either
+            tree[i] = best
+
+    def first_at_least(self, start, value, stop=None):
+        """Returns the first position in [start, stop) whose value is >= value, or None."""
+        size = self.size
+        if stop is None or stop > size:
+            stop = size
+        tree = self.tree
+        if start >= stop or tree[1] < value:
+            return None
+        # Walk right from the leaf at start, one ever larger subtree at a time,
+        # until a subtree holds a large enough value; then descend into it.
+        i = start + size
+        shift = 0  # i covers the leaves from (i << shift) - size onward
+        while tree[i] < value:
+            while i & 1:
+                i //= 2
+                shift += 1
+            i += 1
+            if (i << shift) - size >= stop:
+                return None
+        while i < size:
+            i *= 2
+            if tree[i] < value:
+                i += 1
+        pos = i - size
+        return pos if pos < stop else None
+
+    def _grow(self):
+        # The old tree becomes the left half of the new one: each of its levels
+        # moves down one level, and the new right half is empty.
+        old = self.tree
+        self.size *= 2
+        self.tree = [float("-inf")] * (2 * self.size)
+        self.tree[1] = old[1]
+        width = 1
+        while width < self.size:
+            self.tree[2 * width:3 * width] = old[width:2 * width]
+            width *= 2
+
+
+class ShelfIndex:
+    """
+    Tracks the boards of a plan for fast first-fit and best-fit lookups.
+
+    Call add_board() when a board is appended and update_board() after any
+    shelf on it was filled or added.
+    """
+
+    def __init__(self, stock_length, stock_width, kerf, best_fit=False):
+        self.stock_length = stock_length
+        self.stock_width = stock_width
+        self.kerf = kerf
+        self.boards = []
+        self.by_height = {}      # shelf height -> MaxTree of remaining length per board
+        self.heights = []        # sorted shelf heights seen so far
+        self.free = MaxTree()    # unused board width per board
+        # shelf height -> sorted [(remaining_length, board, shelf)], best fit only
+        self.sorted_shelves = {} if best_fit else None
+        self._known = []         # last indexed remaining length per shelf, per board
+
+    def add_board(self, board):
+        """Indexes a newly appended board."""
+        self.boards.append(board)
+        self._known.append([])
+        self.update_board(len(self.boards) - 1)
+
+    def update_board(self, board_index):
+        """Re-indexes the shelves of a board after it changed."""
+        board = self.boards[board_index]
+        known = self._known[board_index]
+        best = {}
+        for shelf_index, shelf in enumerate(board.shelves):
+            height = shelf.height
+            remaining = shelf.remaining_length
+            if height not in best or remaining > best[height]:
+                best[height] = remaining
+            if shelf_index == len(known):
+                known.append(None)
+            if known[shelf_index] != remaining:
+                if self.sorted_shelves is not None:
+                    entries = self.sorted_shelves.setdefault(height, [])
+                    if known[shelf_index] is not None:
+                        del entries[bisect_left(entries, (known[shelf_index], board_index, shelf_index))]
+                    insort(entries, (remaining, board_index, shelf_index))
+                known[shelf_index] = remaining
+        for height, remaining in best.items():
+            tree = self.by_height.get(height)
+            if tree is None:
+                tree = self.by_height[height] = MaxTree()
+                insort(self.heights, height)
+            tree.set(board_index, remaining)
+        self.free.set(board_index, self.stock_width - board.used_height)
+
+    def next_board(self, start, piece):
+        """
+        Returns the first board at or after start that may take the piece on an
+        existing shelf or a new shelf, or len(boards) if none can.
+        """
+        kerf = self.kerf
+        # Each lookup only needs to search up to the best board found so far
+        best = len(self.boards)
+        if piece["length"] <= self.stock_length:
+            found = self.free.first_at_least(start, piece["width"] + kerf - _EPS, best)
+            if found is not None:
+                best = found
+        if piece["width"] <= self.stock_length:
+            found = self.free.first_at_least(start, piece["length"] + kerf - _EPS, best)
+            if found is not None:
+                best = found
+        for need_height, need_length in ((piece["width"], piece["length"] + kerf),
+                                         (piece["length"], piece["width"] + kerf)):
+            for height in self.heights[bisect_left(self.heights, need_height):]:
+                found = self.by_height[height].first_at_least(start, need_length, best)
+                if found is not None:
+                    best = found
+        return best
+
+    def best_shelf(self, piece):
+        """
+        Returns (board_index, shelf) for the existing shelf that a copy of the
+        piece fits most tightly, in either orientation, or None.
+        """
+        best = None
+        for need_height, need_length in ((piece["width"], piece["length"] + self.kerf),
+                                         (piece["length"], piece["width"] + self.kerf)):
+            for height in self.heights[bisect_left(self.heights, need_height):]:
+                entries = self.sorted_shelves[height]
+                if entries[-1][0] < need_length:
+                    continue
+                i = bisect_left(entries, (need_length,))
+                if i < len(entries):
+                    remaining, board_index, shelf_index = entries[i]
+                    key = (remaining - need_length, board_index, shelf_index)
+                    if best is None or key < best:
+                        best = key
+        if best is None:
+            return None
+        return best[1], self.boards[best[1]].shelves[best[2]]
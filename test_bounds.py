@@ -0,0 +1,12 @@
+"""Regression tests for the lower bounds in bounds.py. Run with python -m pytest."""
+
+import packing
+
+
+def test_bound_allows_pieces_cut_flush_with_the_board_edge():
+    # The shelf engine opens a shelf for a 60" piece on a 60" board: kerf only falls between cuts
+    cut_pieces = [{"length": 30, "width": 3, "quantity": 2},
+                  {"length": 59.9, "width": 30, "quantity": 6},
+                  {"length": 60, "width": 30, "quantity": 12}]
+    plan = packing.optimize(60, 96, cut_pieces)
+    assert plan.lower_bound <= plan.board_count
@@ -0,0 +1,110 @@
+"""
+Checks the shelf engine against the original one-piece-at-a-time shelf
+packer it replaced. Run with python -m pytest.
+"""
+
+import random
+
+import guillotine
+import packing
+from layout import cut_copies
+
+KERF = packing.BLADE_KERF
+
+
+def reference_pack(stock_length, stock_width, cut_pieces, kerf=KERF):
+    """The original packer: every piece, area descending, goes to the first board and shelf that takes it."""
+    pieces = []
+    for item in cut_pieces:
+        pieces.extend({"length": item["length"], "width": item["width"]} for _ in range(item["quantity"]))
+    pieces.sort(key=lambda p: p["length"] * p["width"], reverse=True)
+    boards = []
+    for piece in pieces:
+        rotated = {"length": piece["width"], "width": piece["length"]}
+        placed = False
+        for board in boards:
+            for shelf in board["shelves"]:
+                for oriented in (piece, rotated):
+                    if oriented["length"] + kerf <= shelf["remaining_length"] and oriented["width"] <= shelf["height"]:
+                        shelf["pieces"].append(oriented)
+                        shelf["remaining_length"] -= oriented["length"] + kerf
+                        placed = True
+                        break
+                if placed:
+                    break
+            if placed:
+                break
+            for oriented in (piece, rotated):
+                if (board["used_height"] + oriented["width"] + kerf <= stock_width
+                        and oriented["length"] <= stock_length):
+                    board["shelves"].append({"height": oriented["width"],
+                                             "remaining_length": stock_length - (oriented["length"] + kerf),
+                                             "pieces": [oriented]})
+                    board["used_height"] += oriented["width"] + kerf
+                    placed = True
+                    break
+            if placed:
+                break
+        if not placed:
+            for oriented in (piece, rotated):
+                if oriented["width"] + kerf <= stock_width and oriented["length"] + kerf <= stock_length:
+                    boards.append({"used_height": oriented["width"] + kerf,
+                                   "shelves": [{"height": oriented["width"],
+                                                "remaining_length": stock_length - (oriented["length"] + kerf),
+                                                "pieces": [oriented]}]})
+                    break
+    return boards
+
+
+def layouts(boards):
+    return [(board["used_height"],
+             [(shelf["height"], shelf["remaining_length"], [(p["length"], p["width"]) for p in shelf["pieces"]])
+              for shelf in board["shelves"]])
+            for board in boards]
+
+
+def test_cut_copies_keeps_exact_fits():
+    assert cut_copies(22.1, 5.525, 10)[0] == 4
+    assert cut_copies(10, 2.5, 3) == (3, 2.5)
+
+
+def test_exact_fit_row_stays_on_one_shelf():
+    plan = packing.optimize(27.625, 10, [{"length": 5.4, "width": 2, "quantity": 5}])
+    assert [len(shelf.pieces) for shelf in plan.boards[0].shelves] == [5]
+
+
+def test_shelf_engine_matches_one_piece_at_a_time():
+    rng = random.Random(2)
+    for _ in range(300):
+        stock_length, stock_width = rng.choice([(96, 48), (96, 30.25), (27.625, 10), (60, 24)])
+        cut_pieces = []
+        for _ in range(rng.randint(1, 8)):
+            length = rng.choice([rng.randint(1, 40), round(rng.uniform(1, 30), 3), rng.randint(8, 240) / 8])
+            width = rng.choice([rng.randint(1, 20), round(rng.uniform(1, 20), 3), rng.randint(8, 160) / 8])
+            cut_pieces.append({"length": min(length, stock_length - 1), "width": min(width, stock_width - 1),
+                               "quantity": rng.randint(1, 40)})
+        plan = packing.optimize(stock_length, stock_width, cut_pieces)
+        assert layouts(plan.boards) == layouts(reference_pack(stock_length, stock_width, cut_pieces)), cut_pieces
+
+
+def test_free_rect_engines_follow_the_shelf_kerf_rule():
+    # Turned lengthwise, four pieces fit only if each ends flush with the board, as on a shelf
+    cut_pieces = [{"length": 47.95, "width": 20, "quantity": 4}]
+    assert packing.optimize(48, 96, cut_pieces).board_count == 1
+    groups = packing.piece_groups(cut_pieces)
+    for maxrects in (False, True):
+        assert len(guillotine.pack(48, 96, groups, KERF, maxrects=maxrects)) == 1
+
+
+def test_free_rect_engines_never_lose_to_shelves():
+    rng = random.Random(23)
+    for _ in range(20):
+        cut_pieces = [{"length": rng.randint(2, 48), "width": rng.randint(2, 30), "quantity": rng.randint(1, 4)}
+                      for _ in range(rng.randint(5, 60))]
+        shelf = packing.optimize(96, 48, cut_pieces)
+        piece_area = sum(p["length"] * p["width"] * p["quantity"] for p in cut_pieces)
+        for engine in (packing.GUILLOTINE, packing.MAXRECTS):
+            plan = packing.optimize(96, 48, cut_pieces, engine=engine)
+            assert plan.board_count <= shelf.board_count, (engine, cut_pieces)
+            # Waste is the same kind of number for every engine
+            assert abs(plan.total_waste - (plan.board_count * 96 * 48 - piece_area)) < 1e-6